@@ -0,0 +1,144 @@
+"""Offline replay of Wikidata, depiction and Mastodon traffic for the benchmark suite.
+
+SPARQL queries are answered at the ``urlopen`` level so SPARQLWrapper still builds the
+request and decodes the JSON; HTTP session ``get`` calls are answered with recorded
+``w/api.php`` revisions, ``Special:EntityData`` revisions and depiction/taxon images;
+the Mastodon client is replaced by an in-memory fake.
+"""
+
+import copy
+import io
+import json
+import re
+import urllib.parse
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+import SPARQLWrapper.Wrapper
+from helpers import FIXTURES, load_fixture
+
+from daily_lotus import mastodon_client, metrics
+
+
+class NotRecordedError(AssertionError):
+    def __init__(self, what: str) -> None:
+        super().__init__(f"No recorded response for {what}")
+
+
+class FakeSparqlResponse(io.BytesIO):
+    def __init__(self, body: bytes, url: str) -> None:
+        super().__init__(body)
+        self.url = url
+
+    def info(self) -> dict[str, str]:
+        return {"content-type": "application/sparql-results+json"}
+
+    def geturl(self) -> str:
+        return self.url
+
+    def getcode(self) -> int:
+        return 200
+
+
+class Replay:
+    """Recorded responses, optionally scaled up to synthetic sizes."""
+
+    def __init__(self) -> None:
+        self.candidates = load_fixture("sparql_candidates.json")
+        self.molecule_details = load_fixture("sparql_molecule_details.json")
+        self.current_labels = load_fixture("sparql_current_labels.json")
+        self.ask = load_fixture("sparql_ask.json")
+        self.revisions = load_fixture("wikidata_revisions.json")
+        self.entity_data = load_fixture("entity_data.json")
+        self.depiction = (FIXTURES / "depict.svg").read_bytes()
+        self.taxon_image = b"\xff\xd8\xff\xe0" + bytes(2048)
+        self._candidates_body: bytes | None = None
+
+    def set_candidate_count(self, n: int) -> None:
+        """Serve ``n`` synthetic candidate compounds instead of the recorded ones."""
+        bindings = [
+            {"compound": {"type": "uri", "value": f"http://www.wikidata.org/entity/Q{10_000_000 + i}"}}
+            for i in range(n)
+        ]
+        self._candidates_body = json.dumps({**self.candidates, "results": {"bindings": bindings}}).encode()
+
+    def sparql(self, query: str) -> bytes:
+        if query.lstrip().startswith("ASK"):
+            return json.dumps(self.ask).encode()
+        if "SELECT DISTINCT ?compound" in query:
+            return self._candidates_body or json.dumps(self.candidates).encode()
+        if "SELECT ?compoundLabel ?taxonLabel ?referenceLabel" in query:
+            return json.dumps(self.current_labels).encode()
+        if match := re.search(r"VALUES \?compound \{wd:(Q\d+)\}", query):
+            # Answer for whichever compound was asked about
+            body = copy.deepcopy(self.molecule_details)
+            for row in body["results"]["bindings"]:
+                row["compound"]["value"] = f"http://www.wikidata.org/entity/{match.group(1)}"
+            return json.dumps(body).encode()
+        raise NotRecordedError(query)
+
+    def urlopen(self, request: Any, timeout: float | None = None) -> FakeSparqlResponse:
+        url = request.full_url
+        params = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)
+        if request.data:
+            params.update(urllib.parse.parse_qs(request.data.decode()))
+        return FakeSparqlResponse(self.sparql(params["query"][0]), url)
+
+    def get(self, url: str, params: dict[str, str] | None = None, **kwargs: Any) -> requests.Response:
+        if url.endswith("/w/api.php"):
+            return _response(json.dumps(self.revisions).encode(), "application/json", url)
+        if match := re.search(r"Special:EntityData/(Q\d+)\.json\?revision=(\d+)", url):
+            entity = {**self.entity_data[match.group(2)], "id": match.group(1)}
+            return _response(json.dumps({"entities": {match.group(1): entity}}).encode(), "application/json", url)
+        if "/depict/2D" in url:
+            return _response(self.depiction, "image/svg+xml", url)
+        if "commons.wikimedia.org" in url:
+            return _response(self.taxon_image, "image/jpeg", url)
+        raise NotRecordedError(url)
+
+
+def _response(body: bytes, content_type: str, url: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.headers["Content-Type"] = content_type
+    response.url = url
+    return response
+
+
+class FakeMastodon:
+    """Stands in for ``mastodon.Mastodon``: accepts uploads and statuses, returns ids."""
+
+    def __init__(self) -> None:
+        self.media: list[bytes] = []
+        self.statuses: list[dict[str, Any]] = []
+
+    def media_post(self, media_file: Any, mime_type: str | None = None, description: str | None = None) -> dict:
+        self.media.append(media_file.read())
+        return {"id": str(len(self.media))}
+
+    def status_post(
+        self, status: str, media_ids: Any = None, in_reply_to_id: str | None = None, idempotency_key: str | None = None
+    ) -> dict:
+        self.statuses.append({"status": status, "media_ids": media_ids, "in_reply_to_id": in_reply_to_id})
+        return {"id": str(100_000_000_000 + len(self.statuses))}
+
+
+@pytest.fixture
+def replay(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Replay:
+    """Route all network traffic to recorded fixtures and run inside a scratch directory."""
+    recorded = Replay()
+    monkeypatch.setattr(SPARQLWrapper.Wrapper, "urlopener", recorded.urlopen)
+    monkeypatch.setattr(requests.Session, "get", lambda session, url, **kwargs: recorded.get(url, **kwargs))
+    monkeypatch.chdir(tmp_path)
+    metrics.reset()
+    return recorded
+
+
+@pytest.fixture
+def fake_mastodon(monkeypatch: pytest.MonkeyPatch) -> FakeMastodon:
+    client = FakeMastodon()
+    monkeypatch.setattr(mastodon_client, "get_client", lambda account=None: client)
+    return client
@@ -0,0 +1,46 @@
+"""Shared helpers of the benchmark suite (the fixtures themselves live in conftest.py)."""
+
+import json
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from daily_lotus.standin import DEFAULT_FIXTURES
+
+FIXTURES = DEFAULT_FIXTURES
+
+
+def load_fixture(name: str) -> Any:
+    return json.loads((FIXTURES / name).read_text())
+
+
+def _cairo_available() -> bool:
+    try:
+        import cairosvg  # noqa: F401
+    except OSError:
+        return False
+    return True
+
+
+requires_cairo = pytest.mark.skipif(not _cairo_available(), reason="libcairo is not installed")
+
+
+def peak_memory_mib(fn: Callable[[], Any]) -> float:
+    """Run ``fn`` once under tracemalloc and return its peak allocation in MiB."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def report(benchmark: Any, items: int, peak_mib: float) -> None:
+    """Attach throughput and peak memory to the benchmark's JSON/table output."""
+    benchmark.extra_info["items"] = items
+    benchmark.extra_info["peak_memory_mib"] = round(peak_mib, 2)
+    if benchmark.stats is not None:
+        benchmark.extra_info["items_per_second"] = round(items / benchmark.stats.stats.mean, 1)
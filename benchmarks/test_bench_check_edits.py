@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import pytest
+from helpers import peak_memory_mib, report
+
+from daily_lotus import check_edits, metrics
+
+COMPOUND_LABEL = "Zythiostromic acid C"
+TAXON_LABEL = "Nectria pseudotrichia"
+REFERENCE_LABEL = (
+    "New isocoumarins, naphthoquinones, and a cleistanthane-type diterpene from Nectria pseudotrichia 120-1NP."
+)
+
+
+def synthetic_log(n: int, edited_every: int = 100) -> list[dict]:
+    """``n`` logged posts; one in ``edited_every`` has a compound label edited since it was posted."""
+    return [
+        {
+            "compound_qid": f"Q{10_000_000 + i}",
+            "taxon_qid": "Q6985860",
+            "reference_qid": "Q52604398",
+            "compound_label": COMPOUND_LABEL,
+            "compound_label_last_checked": "Zythiostromic acid" if i % edited_every == 0 else COMPOUND_LABEL,
+            "taxon_label": TAXON_LABEL,
+            "taxon_label_last_checked": TAXON_LABEL,
+            "reference_label": REFERENCE_LABEL,
+            "reference_label_last_checked": REFERENCE_LABEL,
+            "toot_id": str(114_000_000_000_000_000 + i),
+            "timestamp": "2025-04-18T09:26:59.761392",
+            "last_reply_timestamp": "2025-04-18T09:26:59.761392+00:00",
+            "p703_exists_last_checked": True,
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("n", [1_000, 10_000, 100_000])
+def test_check_edits(benchmark, replay, fake_mastodon, n):
+    log_text = json.dumps(synthetic_log(n))
+
+    def setup():
+        Path("posted_log_extended.json").write_text(log_text)
+        metrics.reset()
+
+    benchmark.pedantic(check_edits.check_edits, setup=setup, rounds=1 if n >= 100_000 else 3)
+
+    assert metrics.counter_total("replies_posted") == n // 100
+    setup()
+    report(benchmark, items=n, peak_mib=peak_memory_mib(check_edits.check_edits))
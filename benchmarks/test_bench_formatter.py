@@ -0,0 +1,28 @@
+from helpers import peak_memory_mib, report
+
+from daily_lotus.formatter import compose_message
+
+DETAILS = {
+    "compound": "Zythiostromic acid C",
+    "compound_qid": "Q104986113",
+    "taxon": "Nectria pseudotrichia",
+    "taxon_qid": "Q6985860",
+    "reference": "New isocoumarins, naphthoquinones, and a cleistanthane-type diterpene from Nectria pseudotrichia 120-1NP.",
+    "reference_qid": "Q52604398",
+    "taxon_emoji": "🍄",
+    "kingdom_label": "fungus",
+}
+
+
+def test_compose_message(benchmark):
+    message = benchmark(compose_message, **DETAILS)
+    assert len(message) <= 500
+    report(benchmark, items=1, peak_mib=peak_memory_mib(lambda: compose_message(**DETAILS)))
+
+
+def test_compose_message_with_fallbacks(benchmark):
+    # A long reference title forces both shortening steps
+    details = {**DETAILS, "reference": DETAILS["reference"] * 2}
+    message = benchmark(compose_message, **details)
+    assert "#LOTUS" not in message
+    report(benchmark, items=1, peak_mib=peak_memory_mib(lambda: compose_message(**details)))
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+from helpers import peak_memory_mib, report, requires_cairo
+
+import run_bot
+from daily_lotus.mastodon_client import post_to_mastodon
+
+
+@pytest.mark.parametrize("n", [1_000])
+def test_run_selection_all_posted(benchmark, replay, n):
+    # Worst case: every candidate has already been posted, so the whole pool is scanned
+    qids = [f"Q{10_000_000 + i}" for i in range(n)]
+    with open("candidates.json", "w") as f:
+        json.dump(qids, f)
+    with open("posted_log.json", "w") as f:
+        json.dump([[qid, "Q6985860"] for qid in qids], f)
+
+    benchmark.pedantic(run_bot.run, kwargs={"dry_run": True, "use_cache": True}, rounds=3)
+
+    report(benchmark, items=n, peak_mib=peak_memory_mib(lambda: run_bot.run(dry_run=True, use_cache=True)))
+
+
+@requires_cairo
+def test_run_posts_first_candidate(benchmark, replay, fake_mastodon):
+    with open("candidates.json", "w") as f:
+        json.dump(["Q104986113"], f)
+
+    def setup():
+        with open("posted_log_extended.json", "w") as f:
+            json.dump([], f)
+
+    benchmark.pedantic(run_bot.run, kwargs={"use_cache": True}, setup=setup, rounds=5)
+
+    assert fake_mastodon.statuses
+    setup()
+    report(benchmark, items=1, peak_mib=peak_memory_mib(lambda: run_bot.run(use_cache=True)))
+
+
+@requires_cairo
+def test_post_to_mastodon_media(benchmark, replay, fake_mastodon):
+    # Two downloads, one svg2png conversion, two uploads and one status
+    def post():
+        return post_to_mastodon(
+            "🧪",
+            image_url="https://dev.api.naturalproducts.net/latest/depict/2D?smiles=CCO",
+            taxon_image_url="http://commons.wikimedia.org/wiki/Special:FilePath/Nectria%20pseudotrichia.jpg",
+        )
+
+    status = benchmark(post)
+
+    assert status["id"]
+    assert fake_mastodon.media[0].startswith(b"\x89PNG")
+    report(benchmark, items=1, peak_mib=peak_memory_mib(post))
@@ -0,0 +1,36 @@
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+ENTRY_POINTS = ["run_bot", "run_daemon", "daily_lotus.check_edits", "daily_lotus.event_stream"]
+
+
+def import_time_us(module: str) -> int:
+    """Cumulative import time of ``module`` in microseconds, as reported by ``-X importtime``."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    match = re.search(rf"^import time:\s*\d+ \|\s*(\d+) \| {re.escape(module)}$", result.stderr, re.M)
+    assert match, result.stderr
+    return int(match.group(1))
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_cold_start(benchmark, module):
+    # A fresh interpreter per round: this is what every cron invocation pays before doing any work
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", f"import {module}"],),
+        kwargs={"cwd": ROOT, "check": True},
+        rounds=5,
+    )
+
+    benchmark.extra_info["import_time_ms"] = round(min(import_time_us(module) for _ in range(3)) / 1000, 1)
@@ -0,0 +1,22 @@
+import pytest
+from helpers import peak_memory_mib, report
+
+from daily_lotus.wikidata_query import get_candidate_qids, get_molecule_details
+
+
+@pytest.mark.parametrize("n", [10_000, 100_000])
+def test_get_candidate_qids(benchmark, replay, n):
+    replay.set_candidate_count(n)
+
+    qids = benchmark(get_candidate_qids)
+
+    assert len(qids) == n
+    report(benchmark, items=n, peak_mib=peak_memory_mib(get_candidate_qids))
+
+
+def test_get_molecule_details(benchmark, replay):
+    details = benchmark(get_molecule_details, "Q104986113")
+
+    assert details is not None
+    assert details["taxon_qid"] == "Q6985860"
+    report(benchmark, items=1, peak_mib=peak_memory_mib(lambda: get_molecule_details("Q104986113")))
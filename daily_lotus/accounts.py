@@ -0,0 +1,81 @@
+"""Mastodon accounts the daily post fans out to.
+
+Without ``accounts.json`` the bot posts to the single account configured by
+``MASTODON_API_BASE_URL`` and ``MASTODON_ACCESS_TOKEN``. With it, every listed account gets
+the same occurrence, in its own language, unless its ``kingdoms`` filter excludes it::
+
+    [
+      {"name": "main"},
+      {"name": "fr", "language": "fr", "access_token_env": "MASTODON_FR_ACCESS_TOKEN"},
+      {"name": "plants", "kingdoms": ["Q756"], "api_base_url": "https://botsin.space",
+       "access_token_env": "MASTODON_PLANTS_ACCESS_TOKEN"}
+    ]
+
+The first account is the primary one: its toot is logged, and ``check_edits`` replies to
+it with the default client, so it should be the ``.env`` account and post every
+occurrence (no ``kingdoms`` filter).
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any
+
+from daily_lotus import config
+from daily_lotus.formatter import TEMPLATES
+
+ACCOUNTS_FILE = "accounts.json"
+
+
+class AccountConfigError(ValueError):
+    def __init__(self, name: str, problem: str) -> None:
+        super().__init__(f"🧨 Account {name!r} in {ACCOUNTS_FILE}: {problem}")
+
+
+@dataclass(frozen=True)
+class Account:
+    name: str
+    api_base_url: str | None
+    access_token: str | None
+    language: str = "en"
+    # Kingdom QIDs (Q729 Animalia, Q756 Plantae, Q764 Fungi, Q10876 Bacteria); None posts everything
+    kingdoms: frozenset[str] | None = None
+
+    def accepts(self, kingdom_qid: str) -> bool:
+        return self.kingdoms is None or kingdom_qid in self.kingdoms
+
+
+def default_account() -> Account:
+    return Account("default", config.MASTODON_API_BASE_URL, config.MASTODON_ACCESS_TOKEN)
+
+
+def parse_account(entry: dict[str, Any]) -> Account:
+    name = str(entry.get("name", "default"))
+    language = str(entry.get("language", "en"))
+    if language not in TEMPLATES:
+        raise AccountConfigError(name, f"no message template for language {language!r}")
+    # Tokens stay out of accounts.json: they come from the environment (or .env)
+    token_env = entry.get("access_token_env")
+    access_token = os.getenv(token_env) if token_env else config.MASTODON_ACCESS_TOKEN
+    if token_env and not access_token:
+        raise AccountConfigError(name, f"environment variable {token_env} is not set")
+    kingdoms = entry.get("kingdoms")
+    return Account(
+        name=name,
+        api_base_url=entry.get("api_base_url", config.MASTODON_API_BASE_URL),
+        access_token=access_token,
+        language=language,
+        kingdoms=frozenset(kingdoms) if kingdoms is not None else None,
+    )
+
+
+def load_accounts() -> list[Account]:
+    if not os.path.exists(ACCOUNTS_FILE):
+        return [default_account()]
+    with open(ACCOUNTS_FILE) as f:
+        accounts = [parse_account(entry) for entry in json.load(f)]
+    if not accounts:
+        raise AccountConfigError("", "no accounts listed")
+    if accounts[0].kingdoms is not None:
+        raise AccountConfigError(accounts[0].name, "the primary (first) account cannot filter kingdoms")
+    return accounts
@@ -1,11 +1,13 @@
 import argparse
 import json
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import cast
 
-from daily_lotus.log import PostRecord, load_extended_log
-from daily_lotus.mastodon_client import post_to_mastodon
+from daily_lotus import metrics
+from daily_lotus.log import PostRecord, checkpoint_entry, load_extended_log, log_lock, save_extended_log
+from daily_lotus.reply_queue import drain_queue, enqueue_reply
 from daily_lotus.wikidata_query import (
     fetch_current_labels,
     find_p703_removal_editor,
@@ -16,6 +18,41 @@ from daily_lotus.wikidata_query import (
 
 LOG_FILE = Path("posted_log_extended.json")
 DEBUG_LOG_FILE = Path("posted_log_extended.dryrun.json")
+# Where the next run starts, so runs cut short by their budget take turns over the whole log
+STATE_FILE = Path("check_edits_state.json")
+
+
+class Budget:
+    """Per-run limits on wall-clock time and Wikidata requests (SPARQL and API calls).
+
+    The budget is checked between entries, so a run may overshoot by one entry's requests.
+    """
+
+    def __init__(self, max_seconds: float | None = None, max_requests: int | None = None) -> None:
+        self.deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+        self.max_requests = max_requests
+        self.requests_at_start = self.requests()
+
+    @staticmethod
+    def requests() -> int:
+        return metrics.span_count("sparql_query") + metrics.span_count("wikidata_api")
+
+    def exhausted(self) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        return self.max_requests is not None and self.requests() - self.requests_at_start >= self.max_requests
+
+
+def load_cursor() -> int:
+    if not STATE_FILE.exists():
+        return 0
+    return int(json.loads(STATE_FILE.read_text()).get("cursor", 0))
+
+
+def save_cursor(cursor: int) -> None:
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"cursor": cursor}))
+    tmp.replace(STATE_FILE)
 
 
 def format_unified_summary(
@@ -160,6 +197,7 @@ def process_entry(entry: PostRecord, dry_run: bool) -> bool:
 
     if not entry.get("toot_id"):
         print("⚠️ No toot_id available, skipping.")
+        metrics.incr("entries_skipped", reason="no_toot_id")
         return False
 
     since_str = cast(str, entry.get("last_reply_timestamp", entry["timestamp"]))
@@ -181,8 +219,12 @@ def process_entry(entry: PostRecord, dry_run: bool) -> bool:
 
     if not deleted and not changes:
         print("✅ No changes found.")
+        metrics.incr("entries_skipped", reason="no_changes")
         return False
 
+    for kind in (["deletion"] if deleted else []) + [field for field, _, _ in changes]:
+        metrics.incr("edits_detected", kind=kind)
+
     if changes:
         print(f"✏️ Detected edits: {changes}")
     if editors:
@@ -202,38 +244,96 @@ def process_entry(entry: PostRecord, dry_run: bool) -> bool:
     # We only post if editors are loged
     if not editors:
         print("⚠️ No editors found, not posting to Mastodon.")
+        metrics.incr("entries_skipped", reason="no_editors")
         return False
-    if not dry_run and editors:
-        post_to_mastodon(reply, in_reply_to_id=entry["toot_id"])
-        entry["last_reply_timestamp"] = datetime.now(tz=timezone.utc).isoformat()
-    else:
+    if dry_run:
         print("💤 Dry run: not posting to Mastodon.")
+    elif not enqueue_reply(entry, reply):
+        # Sent by drain_queue(), which also sets last_reply_timestamp once the reply is out
+        print("📬 Same reply already queued, not queuing it twice.")
 
     return True
 
 
-def check_edits(dry_run: bool = False) -> None:
+def save_log(log: list[PostRecord]) -> None:
+    save_extended_log(log, LOG_FILE)
+
+
+def check_entries(log: list[PostRecord], dry_run: bool, budget: Budget) -> bool:
+    """Check entries in turn from the saved cursor until all are checked or the budget runs out.
+
+    Every changed entry is checkpointed right away, and the cursor is saved even if an entry
+    raises, so a crash or timeout keeps the work done so far, its replies are not queued
+    again, and the next run starts after the failed entry.
+    """
+    start = load_cursor() % len(log) if log else 0
+    changed = False
+    checked = 0
+    try:
+        while checked < len(log) and not budget.exhausted():
+            entry = log[(start + checked) % len(log)]
+            # Counted before processing: an entry that keeps failing must not block the entries after it
+            checked += 1
+            metrics.incr("entries_checked")
+            if process_entry(entry, dry_run=dry_run):
+                changed = True
+                if not dry_run:
+                    checkpoint_entry(entry, LOG_FILE)
+    finally:
+        if not dry_run and log:
+            save_cursor((start + checked) % len(log))
+
+    if checked < len(log):
+        print(f"⏱️ Budget exhausted after {checked} of {len(log)} entries; the next run resumes from there.")
+        metrics.incr("budget_exhausted")
+    return changed
+
+
+def check_edits(
+    dry_run: bool = False,
+    log: list[PostRecord] | None = None,
+    max_seconds: float | None = None,
+    max_requests: int | None = None,
+) -> None:
     # The time is also logged in the log file
     print(f"🕒 It is: {datetime.now(tz=timezone.utc).isoformat()}")
     print("🔍 Checking for edits to previously posted occurrences...")
-    log = load_extended_log()
-    changed = False
+    budget = Budget(max_seconds, max_requests)
+    # The event-stream consumer or the daily post may update the log meanwhile: wait for them
+    with log_lock(LOG_FILE):
+        # A caller that keeps the log in memory (the daemon) can pass it to skip reloading it
+        if log is None:
+            log = load_extended_log(LOG_FILE)
+
+        if not dry_run:
+            # Replies left over from an interrupted run go out first
+            drain_queue(log, save_log)
+
+        changed = check_entries(log, dry_run, budget)
 
-    for raw_entry in log:
-        if process_entry(raw_entry, dry_run=dry_run):
-            changed = True
+        if changed:
+            if dry_run:
+                print("📝 Dry run mode: would update log with:")
+                print(json.dumps(log, indent=2))
+            else:
+                save_log(log)
+                print("📝 Updated log with the latest checked labels.")
 
-    if changed:
-        if dry_run:
-            print("📝 Dry run mode: would update log with:")
-            print(json.dumps(log, indent=2))
-        else:
-            LOG_FILE.write_text(json.dumps(log, indent=2))
-            print("📝 Updated log with new reply timestamps.")
+        if not dry_run:
+            sent = drain_queue(log, save_log)
+            if sent:
+                print(f"📝 Sent {sent} repl{'y' if sent == 1 else 'ies'} and updated reply timestamps.")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Check for Wikidata edits and reply on Mastodon.")
     parser.add_argument("--dry-run", action="store_true", help="Print reply messages without posting to Mastodon.")
+    parser.add_argument("--max-seconds", type=float, help="Stop checking entries after this many seconds.")
+    parser.add_argument("--max-requests", type=int, help="Stop checking entries after this many Wikidata requests.")
+    metrics.add_cli_arguments(parser)
     args = parser.parse_args()
-    check_edits(dry_run=args.dry_run)
+    try:
+        with metrics.timed("run"):
+            check_edits(dry_run=args.dry_run, max_seconds=args.max_seconds, max_requests=args.max_requests)
+    finally:
+        metrics.export_from_args(args, job="check_edits")
@@ -0,0 +1,16 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Service base URLs. Every one can be overridden from the environment (or .env), e.g. to point
+# the bot at the local stand-in server (python -m daily_lotus.standin) for load testing.
+WD_SPARQL_ENDPOINT = os.getenv("WD_SPARQL_ENDPOINT", "https://query.wikidata.org/sparql")
+WD_SCHOLARLY_SPARQL_ENDPOINT = os.getenv("WD_SCHOLARLY_SPARQL_ENDPOINT", "https://query-scholarly.wikidata.org/sparql")
+WIKIDATA_BASE_URL = os.getenv("WIKIDATA_BASE_URL", "https://www.wikidata.org")
+DEPICT_BASE_URL = os.getenv("DEPICT_BASE_URL", "https://dev.api.naturalproducts.net/latest")
+RECENTCHANGE_STREAM_URL = os.getenv("RECENTCHANGE_STREAM_URL", "https://stream.wikimedia.org/v2/stream/recentchange")
+
+MASTODON_API_BASE_URL = os.getenv("MASTODON_API_BASE_URL")
+MASTODON_ACCESS_TOKEN = os.getenv("MASTODON_ACCESS_TOKEN")
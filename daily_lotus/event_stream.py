@@ -0,0 +1,214 @@
+"""Event-driven edit detection from the Wikimedia recentchange stream.
+
+Instead of polling every logged occurrence, subscribe to the EventStreams ``recentchange``
+feed (server-sent events), keep only Wikidata edits to items referenced by the extended
+log, and run ``process_entry`` on the affected entries alone.
+
+The query service lags behind edits by a few minutes, so affected entries are processed
+once they have settled for ``--settle`` seconds rather than immediately. The nightly
+``check_edits`` poll remains useful as a safety net for anything missed while the
+consumer was down.
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from daily_lotus import config, metrics
+from daily_lotus.check_edits import process_entry, save_log
+from daily_lotus.http_session import get_session
+from daily_lotus.log import EntryKey, LogVersion, PostRecord, entry_key, load_extended_log, log_lock, log_version
+from daily_lotus.reply_queue import drain_queue
+
+STATE_FILE = Path("event_stream_state.json")
+# Save the last event id at least this often, so a restart after a quiet stretch replays little
+STATE_SAVE_INTERVAL = 60.0
+USER_AGENT = "DailyLotusBot/0.1 (https://www.earthmetabolome.org/; contact@earthmetabolome.org)"
+
+Event = tuple[str | None, dict[str, Any]]
+
+
+def tracked_qids(log: list[PostRecord]) -> dict[str, set[EntryKey]]:
+    """Map every compound, taxon and reference QID in the log to the entries that mention it."""
+    tracked: dict[str, set[EntryKey]] = {}
+    for entry in log:
+        if not entry.get("toot_id"):
+            continue
+        for qid in (entry["compound_qid"], entry["taxon_qid"], entry["reference_qid"]):
+            tracked.setdefault(qid, set()).add(entry_key(entry))
+    return tracked
+
+
+def parse_sse(lines: Iterable[str]) -> Iterator[Event]:
+    """Yield ``(event id, data)`` pairs from server-sent event lines."""
+    event_id: str | None = None
+    data: list[str] = []
+    for line in lines:
+        if not line:
+            if data:
+                try:
+                    yield event_id, json.loads("\n".join(data))
+                except json.JSONDecodeError:
+                    metrics.incr("stream_events_malformed")
+            event_id, data = None, []
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+        elif line.startswith("id:"):
+            event_id = line[3:].strip()
+    if data:
+        try:
+            yield event_id, json.loads("\n".join(data))
+        except json.JSONDecodeError:
+            metrics.incr("stream_events_malformed")
+
+
+def read_replay(path: Path) -> Iterator[Event]:
+    """Read recorded events, either as raw server-sent events or one JSON object per line."""
+    with open(path) as f:
+        lines = [line.rstrip("\n") for line in f]
+    if any(line.startswith("data:") for line in lines):
+        yield from parse_sse(lines)
+    else:
+        yield from ((None, json.loads(line)) for line in lines if line.strip())
+
+
+def stream_recentchanges(url: str, last_event_id: str | None = None) -> Iterator[Event]:
+    """Follow the live stream forever, reconnecting (and resuming) after disconnects."""
+    import requests
+
+    backoff = 1.0
+    while True:
+        headers = {"Accept": "text/event-stream", "User-Agent": USER_AGENT}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+        try:
+            with get_session().get(url, headers=headers, stream=True, timeout=(10, 60)) as response:
+                response.raise_for_status()
+                for event_id, event in parse_sse(response.iter_lines(decode_unicode=True)):
+                    last_event_id = event_id or last_event_id
+                    yield event_id, event
+            print("🔌 Stream closed by the server, reconnecting...")
+            backoff = 1.0
+        except requests.RequestException as e:
+            print(f"🔌 Stream disconnected ({e}), reconnecting in {backoff:.0f}s...")
+            backoff = min(backoff * 2, 60)
+        metrics.incr("stream_reconnects")
+        time.sleep(backoff)
+
+
+class EditConsumer:
+    """Collects entries touched by stream events and processes them once they have settled."""
+
+    def __init__(self, dry_run: bool = False, settle: float = 300) -> None:
+        self.dry_run = dry_run
+        self.settle = settle
+        self.pending: dict[EntryKey, float] = {}
+        self.log: list[PostRecord] = []
+        self.tracked: dict[str, set[EntryKey]] = {}
+        self.log_version: LogVersion | None = None
+        self.last_event_id: str | None = None
+        self.state_saved_at = time.monotonic()
+        self.reload_log()
+
+    def reload_log(self) -> None:
+        """(Re)load the log and tracked QIDs if the log or its journal changed, e.g. after a new daily post."""
+        version = log_version()
+        if version == self.log_version:
+            return
+        self.log = load_extended_log()
+        self.tracked = tracked_qids(self.log)
+        self.log_version = version
+        print(f"👀 Tracking {len(self.tracked)} QIDs from {len(self.log)} logged posts.")
+
+    def handle(self, event_id: str | None, event: dict[str, Any]) -> None:
+        metrics.incr("stream_events_seen")
+        if event_id:
+            self.last_event_id = event_id
+        if event.get("wiki") != "wikidatawiki" or event.get("namespace", 0) != 0:
+            return
+        keys = self.tracked.get(str(event.get("title", "")))
+        if not keys:
+            return
+        metrics.incr("stream_events_matched")
+        print(f"📡 {event.get('type', 'edit')} on {event['title']} by {event.get('user')}")
+        now = time.monotonic()
+        for key in keys:
+            # Every edit restarts the timer: the query service may not have the latest one yet
+            self.pending[key] = now
+
+    def flush(self, force: bool = False) -> int:
+        """Process the pending entries that have settled (all of them if ``force``)."""
+        now = time.monotonic()
+        due = [key for key, seen in self.pending.items() if force or now - seen >= self.settle]
+        if not due:
+            if now - self.state_saved_at >= STATE_SAVE_INTERVAL:
+                self.save_state()
+            return 0
+
+        # check_edits or the daily post may be rewriting the log: wait, then start from their version
+        with log_lock():
+            self.reload_log()
+            entries = {entry_key(entry): entry for entry in self.log}
+            changed = False
+            for key in due:
+                del self.pending[key]
+                if (entry := entries.get(key)) is not None:
+                    metrics.incr("entries_checked")
+                    changed = process_entry(entry, dry_run=self.dry_run) or changed
+
+            if not self.dry_run:
+                if changed:
+                    save_log(self.log)
+                drain_queue(self.log, save_log)
+                self.log_version = log_version()
+                self.save_state()
+        return len(due)
+
+    def save_state(self) -> None:
+        # Only checkpoint once nothing is pending, so a restart never skips unprocessed events
+        if self.dry_run or not self.last_event_id or self.pending:
+            return
+        STATE_FILE.write_text(json.dumps({"last_event_id": self.last_event_id}))
+        self.state_saved_at = time.monotonic()
+
+
+def load_last_event_id() -> str | None:
+    if not STATE_FILE.exists():
+        return None
+    last_event_id = json.loads(STATE_FILE.read_text()).get("last_event_id")
+    return str(last_event_id) if last_event_id else None
+
+
+def consume(events: Iterable[Event], consumer: EditConsumer) -> None:
+    for event_id, event in events:
+        consumer.handle(event_id, event)
+        consumer.flush()
+    # A replay file (or a closed stream) has ended: nothing more will settle, process the rest now
+    consumer.flush(force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect edits from the Wikimedia recentchange stream.")
+    parser.add_argument("--dry-run", action="store_true", help="Print reply messages without posting to Mastodon.")
+    parser.add_argument("--replay", type=Path, help="Read events from a recorded file instead of the live stream.")
+    parser.add_argument(
+        "--settle", type=float, default=300, help="Seconds to wait after an edit before checking it (query lag)."
+    )
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    consumer = EditConsumer(dry_run=args.dry_run, settle=args.settle)
+    if args.replay:
+        events: Iterable[Event] = read_replay(args.replay)
+    else:
+        events = stream_recentchanges(config.RECENTCHANGE_STREAM_URL, load_last_event_id())
+    try:
+        consume(events, consumer)
+    except KeyboardInterrupt:
+        print("👋 Stopping, processing what is pending...")
+        consumer.flush(force=True)
+    finally:
+        metrics.export_from_args(args, job="event_stream")
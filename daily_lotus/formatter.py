@@ -3,6 +3,42 @@ class MessageTooLongError(ValueError):
         super().__init__("🧨 Message too long even after all shortening steps.")
 
 
+# Per-language wording. Only the reference title is not localized: it is the paper's title.
+TEMPLATES = {
+    "en": {
+        "header": "📣 Natural Product Occurrence of the Day",
+        "molecule": "🧪 {compound} [{compound_url}] is a molecule\nfound in {article} {taxon_emoji} {kingdom_label}, {taxon} [{taxon_url}]",
+        "reference": "📚 according to: {reference}",
+        "footer": (
+            "✏️ This occurrence is available for curation on Wikidata [{curation_url}]. "
+            "If you spot an error, feel free to improve it!"
+        ),
+        "image_alt_text": "Chemical structure of {compound} displaying atoms and bonds.",
+        "taxon_image_alt_text": "Image of {taxon}, the taxon in which the compound is found.",
+    },
+    "fr": {
+        "header": "📣 Occurrence de produit naturel du jour",
+        "molecule": "🧪 {compound} [{compound_url}] est une molécule\ntrouvée chez {taxon_emoji} {taxon} [{taxon_url}] ({kingdom_label})",
+        "reference": "📚 selon : {reference}",
+        "footer": (
+            "✏️ Cette occurrence peut être améliorée sur Wikidata [{curation_url}]. "
+            "Si vous repérez une erreur, n'hésitez pas à la corriger !"
+        ),
+        "image_alt_text": "Structure chimique de {compound} montrant ses atomes et ses liaisons.",
+        "taxon_image_alt_text": "Image de {taxon}, le taxon dans lequel la molécule est trouvée.",
+    },
+}
+
+
+def compose_alt_texts(compound: str, taxon: str, language: str = "en") -> tuple[str, str]:
+    """Return the alt texts of the structure and taxon images."""
+    template = TEMPLATES[language]
+    return (
+        template["image_alt_text"].format(compound=compound),
+        template["taxon_image_alt_text"].format(taxon=taxon),
+    )
+
+
 def compose_message(
     compound: str,
     compound_qid: str,
@@ -12,7 +48,10 @@ def compose_message(
     reference_qid: str,
     taxon_emoji: str,
     kingdom_label: str,
+    language: str = "en",
 ) -> str:
+    template = TEMPLATES[language]
+
     def choose_article(word: str) -> str:
         return "an" if word and word[0].lower() in "aeiou" else "a"
 
@@ -22,18 +61,23 @@ def compose_message(
     short_reference = f"[https://www.wikidata.org/wiki/{reference_qid}]"
 
     # Footer and hashtags defined separately
-    footer = (
-        f"✏️ This occurrence is available for curation on Wikidata "
-        f"[https://www.wikidata.org/wiki/{compound_qid}#P703]. If you spot an error, feel free to improve it!"
-    )
+    footer = template["footer"].format(curation_url=f"https://www.wikidata.org/wiki/{compound_qid}#P703")
     hashtags = "#LOTUS #Wikidata #LinkedOpenData"
+    molecule = template["molecule"].format(
+        compound=compound,
+        compound_url=f"https://www.wikidata.org/wiki/{compound_qid}",
+        article=article,
+        taxon_emoji=taxon_emoji,
+        kingdom_label=kingdom_label,
+        taxon=taxon,
+        taxon_url=f"https://www.wikidata.org/wiki/{taxon_qid}",
+    )
 
     # Full message with everything
     message = (
-        "📣 Natural Product Occurrence of the Day\n\n"
-        f"🧪 {compound} [https://www.wikidata.org/wiki/{compound_qid}] is a molecule\n"
-        f"found in {article} {taxon_emoji} {kingdom_label}, {taxon} [https://www.wikidata.org/wiki/{taxon_qid}]\n"
-        f"📚 according to: {full_reference}\n\n"
+        f"{template['header']}\n\n"
+        f"{molecule}\n"
+        f"{template['reference'].format(reference=full_reference)}\n\n"
         f"{footer}\n\n"
         f"#DailyNP #OpenScience {hashtags}"
     )
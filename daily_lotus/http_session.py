@@ -0,0 +1,17 @@
+from functools import cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+
+@cache
+def get_session() -> "requests.Session":
+    """Return the process-wide HTTP session.
+
+    Sharing one session keeps connections to Wikidata, Commons and the depiction service
+    alive between requests, which matters most in the long-running daemon.
+    """
+    import requests
+
+    return requests.Session()
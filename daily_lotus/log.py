@@ -1,5 +1,9 @@
+import fcntl
 import json
 import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import TypedDict, cast
 
@@ -53,11 +57,101 @@ class PostRecord(TypedDict):
 #     p703_exists_last_checked: Optional[bool]
 
 
-def load_extended_log() -> list[PostRecord]:
-    if not os.path.exists(EXTENDED_LOG_FILE):
+# An entry is identified by the occurrence it logs
+EntryKey = tuple[str, str, str]
+
+
+def entry_key(entry: PostRecord) -> EntryKey:
+    return entry["compound_qid"], entry["taxon_qid"], entry["reference_qid"]
+
+
+def journal_path(path: str | os.PathLike[str] = EXTENDED_LOG_FILE) -> str:
+    return f"{os.fspath(path)}.journal"
+
+
+# Lock files held by this process; the RLock also serializes threads, which share one flock
+_held: set[str] = set()
+_held_lock = threading.RLock()
+
+
+@contextmanager
+def log_lock(path: str | os.PathLike[str] = EXTENDED_LOG_FILE) -> Iterator[None]:
+    """Hold the extended log (and the reply queue) exclusively for a load/modify/save cycle.
+
+    ``run_bot``, ``check_edits`` and the event-stream consumer may run at the same time, from
+    cron or the daemon; each wraps its whole cycle in this lock so none of them overwrites
+    the others' updates. Reentrant within a process.
+    """
+    lock_file = f"{os.fspath(path)}.lock"
+    with _held_lock:
+        if lock_file in _held:
+            yield
+            return
+        with open(lock_file, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            _held.add(lock_file)
+            try:
+                yield
+            finally:
+                _held.discard(lock_file)
+
+
+# Size and modification time of the log and of its journal, or None where a file is missing
+LogVersion = tuple[tuple[int, int] | None, tuple[int, int] | None]
+
+
+def log_version(path: str | os.PathLike[str] = EXTENDED_LOG_FILE) -> LogVersion:
+    """Tell whether a loaded copy of the log is stale: checkpoints change the journal only."""
+
+    def stat(file: str | os.PathLike[str]) -> tuple[int, int] | None:
+        if not os.path.exists(file):
+            return None
+        st = os.stat(file)
+        return st.st_size, st.st_mtime_ns
+
+    return stat(path), stat(journal_path(path))
+
+
+def load_extended_log(path: str | os.PathLike[str] = EXTENDED_LOG_FILE) -> list[PostRecord]:
+    """Load the extended log, with the entries checkpointed since it was last saved."""
+    if not os.path.exists(path):
         return []
-    with open(EXTENDED_LOG_FILE) as f:
-        return cast(list[PostRecord], json.load(f))
+    with open(path) as f:
+        log = cast(list[PostRecord], json.load(f))
+
+    if os.path.exists(journal_path(path)):
+        index = {entry_key(entry): i for i, entry in enumerate(log)}
+        with open(journal_path(path)) as f:
+            for line in f:
+                try:
+                    entry = cast(PostRecord, json.loads(line))
+                except json.JSONDecodeError:
+                    break  # Torn last line: the process died while writing it
+                if (i := index.get(entry_key(entry))) is not None:
+                    log[i] = entry
+    return log
+
+
+def save_extended_log(log: list[PostRecord], path: str | os.PathLike[str] = EXTENDED_LOG_FILE) -> None:
+    """Write the extended log atomically, so a crash never leaves a truncated file behind."""
+    tmp = f"{os.fspath(path)}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(log, f, indent=2)
+    os.replace(tmp, path)
+    # Every checkpointed entry is in the file now. Writers hold log_lock, so no other
+    # process can have appended to the journal since ``log`` was loaded.
+    if os.path.exists(journal_path(path)):
+        os.remove(journal_path(path))
+
+
+def checkpoint_entry(entry: PostRecord, path: str | os.PathLike[str] = EXTENDED_LOG_FILE) -> None:
+    """Persist one updated entry without rewriting the whole log.
+
+    The entry is appended to a journal next to the log, replayed by ``load_extended_log``
+    and folded into the file by the next ``save_extended_log``.
+    """
+    with open(journal_path(path), "a") as f:
+        f.write(json.dumps(entry) + "\n")
 
 
 def record_post_extended(
@@ -69,21 +163,21 @@ def record_post_extended(
     reference_label: str,
     toot_id: str | None,
 ) -> None:
-    log = load_extended_log()
-    log.append({
-        "compound_qid": compound_qid,
-        "taxon_qid": taxon_qid,
-        "reference_qid": reference_qid,
-        "compound_label": compound_label,
-        "compound_label_last_checked": compound_label,
-        "taxon_label": taxon_label,
-        "taxon_label_last_checked": taxon_label,
-        "reference_label": reference_label,
-        "reference_label_last_checked": reference_label,
-        "toot_id": toot_id,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "last_reply_timestamp": datetime.now(timezone.utc).isoformat(),
-        "p703_exists_last_checked": True,
-    })
-    with open(EXTENDED_LOG_FILE, "w") as f:
-        json.dump(log, f, indent=2)
+    with log_lock():
+        log = load_extended_log()
+        log.append({
+            "compound_qid": compound_qid,
+            "taxon_qid": taxon_qid,
+            "reference_qid": reference_qid,
+            "compound_label": compound_label,
+            "compound_label_last_checked": compound_label,
+            "taxon_label": taxon_label,
+            "taxon_label_last_checked": taxon_label,
+            "reference_label": reference_label,
+            "reference_label_last_checked": reference_label,
+            "toot_id": toot_id,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "last_reply_timestamp": datetime.now(timezone.utc).isoformat(),
+            "p703_exists_last_checked": True,
+        })
+        save_extended_log(log)
@@ -1,21 +1,90 @@
-import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cache
 from io import BytesIO
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import requests
-from dotenv import load_dotenv
-from mastodon import Mastodon
+from daily_lotus import metrics
+from daily_lotus.accounts import Account, default_account
+from daily_lotus.http_session import get_session
 
-load_dotenv()
+if TYPE_CHECKING:
+    from mastodon import Mastodon
 
+# Downloaded image content and its MIME type
+Media = tuple[bytes, str]
+
+
+@dataclass(frozen=True)
+class LocalizedPost:
+    account: Account
+    message: str
+    image_alt_text: str | None = None
+    taxon_image_alt_text: str | None = None
+
+
+def get_client(account: Account | None = None) -> "Mastodon":
+    """Return the process-wide client for ``account`` (by default the configured one).
+
+    The client is reused so that its HTTP connection pool and rate-limit state are shared,
+    and it paces requests from the server's ``X-RateLimit-*`` headers.
+    """
+    account = account or default_account()
+    return _client(account.access_token, account.api_base_url)
+
+
+@cache
+def _client(access_token: str | None, api_base_url: str | None) -> "Mastodon":
+    # Mastodon.py (and requests under it) is slow to import: only pay for it when posting
+    from mastodon import Mastodon
 
-def get_client() -> Mastodon:
     return Mastodon(
-        access_token=os.getenv("MASTODON_ACCESS_TOKEN"),
-        api_base_url=os.getenv("MASTODON_API_BASE_URL"),
+        access_token=access_token,
+        api_base_url=api_base_url,
+        ratelimit_method="pace",
     )
 
 
+def download_media(url: str) -> Media:
+    """Download an image, converting SVG (which Mastodon rejects) to PNG."""
+    headers = {"User-Agent": "DailyLotusBot/0.1 (https://earthmetabolome.org/; contact@earthmetabolome.org)"}
+
+    with metrics.timed("media_download"):
+        response = get_session().get(url, headers=headers, allow_redirects=True, timeout=30)
+        response.raise_for_status()
+
+    if url.endswith(".svg") or response.headers.get("Content-Type") == "image/svg+xml":
+        from cairosvg import svg2png
+
+        png = BytesIO()
+        with metrics.timed("svg2png"):
+            svg2png(bytestring=response.content, write_to=png)
+        return png.getvalue(), "image/png"
+    return response.content, response.headers.get("Content-Type", "image/jpeg")  # fallback
+
+
+def upload_media(client: "Mastodon", media: Media, alt_text: str | None) -> Any:
+    content, mime_type = media
+    with metrics.timed("media_post"):
+        return client.media_post(BytesIO(content), mime_type=mime_type, description=alt_text)  # Add alt-text here
+
+
+def post_status(
+    client: "Mastodon",
+    message: str,
+    media_ids: list[Any],
+    in_reply_to_id: str | None = None,
+    idempotency_key: str | None = None,
+) -> Any:
+    with metrics.timed("status_post"):
+        return client.status_post(
+            message,
+            media_ids=media_ids if media_ids else None,
+            in_reply_to_id=in_reply_to_id,
+            idempotency_key=idempotency_key,
+        )
+
+
 def post_to_mastodon(
     message: str,
     image_url: str | None = None,
@@ -23,36 +92,49 @@ def post_to_mastodon(
     in_reply_to_id: str | None = None,
     image_alt_text: str | None = None,  # Add alt-text parameter
     taxon_image_alt_text: str | None = None,  # Add alt-text for taxon image
+    idempotency_key: str | None = None,
 ) -> Any:
     client = get_client()
     media_ids = []
 
-    def upload_image_from_url(url: str, alt_text: str | None) -> Any:
-        headers = {"User-Agent": "DailyLotusBot/0.1 (https://earthmetabolome.org/; contact@earthmetabolome.org)"}
+    if image_url:
+        media_ids.append(upload_media(client, download_media(image_url), alt_text=image_alt_text))
 
-        response = requests.get(url, headers=headers, allow_redirects=True, timeout=30)
-        response.raise_for_status()
+    if taxon_image_url:
+        media_ids.append(upload_media(client, download_media(taxon_image_url), alt_text=taxon_image_alt_text))
 
-        if url.endswith(".svg") or response.headers.get("Content-Type") == "image/svg+xml":
-            from cairosvg import svg2png
+    return post_status(client, message, media_ids, in_reply_to_id=in_reply_to_id, idempotency_key=idempotency_key)
 
-            png = BytesIO()
-            svg2png(bytestring=response.content, write_to=png)
-            png.seek(0)
-            return client.media_post(png, mime_type="image/png", description=alt_text)  # Add alt-text here
-        else:
-            img = BytesIO(response.content)
-            mime_type = response.headers.get("Content-Type", "image/jpeg")  # fallback
-            return client.media_post(img, mime_type=mime_type, description=alt_text)  # Add alt-text here
 
-    if image_url:
-        media_ids.append(upload_image_from_url(image_url, alt_text=image_alt_text))
+def download_images(image_url: str | None, taxon_image_url: str | None) -> list[Media | None]:
+    """Download the molecule and taxon images once, to share between the posting accounts."""
+    return [download_media(url) if url else None for url in (image_url, taxon_image_url)]
 
-    if taxon_image_url:
-        media_ids.append(upload_image_from_url(taxon_image_url, alt_text=taxon_image_alt_text))
 
-    return client.status_post(
-        message,
-        media_ids=media_ids if media_ids else None,
-        in_reply_to_id=in_reply_to_id,
-    )
+def post_to_accounts(posts: list[LocalizedPost], images: list[Media | None]) -> list[Any]:
+    """Post the same occurrence to several accounts concurrently.
+
+    ``images`` (from ``download_images``) are uploaded by every account: Mastodon media
+    belong to the account that uploaded them.
+
+    Returns
+    -------
+    list[Any]
+        The status posted for each of ``posts``, or the exception that prevented it.
+    """
+
+    def post(localized: LocalizedPost) -> Any:
+        client = get_client(localized.account)
+        alt_texts = (localized.image_alt_text, localized.taxon_image_alt_text)
+        media_ids = [
+            upload_media(client, media, alt_text)
+            for media, alt_text in zip(images, alt_texts, strict=True)
+            if media is not None
+        ]
+        return post_status(client, localized.message, media_ids)
+
+    if not posts:
+        return []
+    with ThreadPoolExecutor(max_workers=len(posts)) as pool:
+        futures = [pool.submit(post, localized) for localized in posts]
+    return [future.exception() or future.result() for future in futures]
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+# Metric keys are (name, sorted label pairs) so the same name can be split by reason, endpoint, ...
+MetricKey = tuple[str, tuple[tuple[str, str], ...]]
+
+PROMETHEUS_PREFIX = "daily_lotus"
+
+_counters: dict[MetricKey, float] = {}
+_spans: dict[MetricKey, dict[str, float]] = {}
+_started_at = datetime.now(timezone.utc)
+# Jobs, posting threads and the daemon's /metrics endpoint record and read concurrently
+_lock = threading.Lock()
+
+
+def _key(name: str, labels: dict[str, Any]) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def incr(name: str, value: float = 1, **labels: Any) -> None:
+    """Increment the counter ``name`` (optionally split by ``labels``).
+
+    Parameters
+    ----------
+    name : str
+        Counter name, e.g. ``"candidates_rejected"``.
+    value : float
+        Amount to add.
+    **labels : Any
+        Label values, e.g. ``reason="too_long"``.
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+    """Record one duration for the span ``name``."""
+    key = _key(name, labels)
+    with _lock:
+        span = _spans.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+        span["count"] += 1
+        span["sum"] += seconds
+        span["max"] = max(span["max"], seconds)
+
+
+@contextmanager
+def timed(name: str, **labels: Any) -> Iterator[None]:
+    """Time the enclosed block and record it as a span.
+
+    Failures are recorded too, with an extra ``<name>_errors`` counter.
+
+    Parameters
+    ----------
+    name : str
+        Span name, e.g. ``"sparql_query"``.
+    **labels : Any
+        Label values, e.g. ``query="candidates"``.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        incr(f"{name}_errors", **labels)
+        raise
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def _copy() -> tuple[dict[MetricKey, float], dict[MetricKey, dict[str, float]]]:
+    """Consistent copies of the counters and spans, safe to iterate while jobs keep recording."""
+    with _lock:
+        return dict(_counters), {key: dict(span) for key, span in _spans.items()}
+
+
+def counter_total(name: str) -> float:
+    """Sum of the counter ``name`` over all label values."""
+    counters, _ = _copy()
+    return sum(value for (n, _), value in counters.items() if n == name)
+
+
+def span_count(name: str) -> int:
+    """Number of recorded spans ``name`` over all label values."""
+    _, spans = _copy()
+    return int(sum(span["count"] for (n, _), span in spans.items() if n == name))
+
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+    _started_at = datetime.now(timezone.utc)
+
+
+def snapshot() -> dict[str, Any]:
+    """Return the recorded metrics as a JSON-serializable dict."""
+    counters, spans = _copy()
+    return {
+        "started_at": _started_at.isoformat(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "counters": [{"name": n, "labels": dict(labels), "value": v} for (n, labels), v in sorted(counters.items())],
+        "spans": [{"name": n, "labels": dict(labels), **span} for (n, labels), span in sorted(spans.items())],
+    }
+
+
+def write_jsonl(path: str | Path, job: str) -> None:
+    """Append a one-line summary of this run to a JSON-lines file."""
+    with open(path, "a") as f:
+        f.write(json.dumps({"job": job, **snapshot()}, ensure_ascii=False) + "\n")
+
+
+def _prometheus_labels(labels: tuple[tuple[str, str], ...], **extra: str) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+
+def format_prometheus(job: str) -> str:
+    """Render the recorded metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    counters, spans = _copy()
+
+    for name in sorted({n for n, _ in counters}):
+        metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{metric}{_prometheus_labels(labels, job=job)} {value:g}")
+
+    for name in sorted({n for n, _ in spans}):
+        metric = f"{PROMETHEUS_PREFIX}_{name}_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for (n, labels), span in sorted(spans.items()):
+            if n == name:
+                lines.append(f"{metric}_count{_prometheus_labels(labels, job=job)} {span['count']:g}")
+                lines.append(f"{metric}_sum{_prometheus_labels(labels, job=job)} {span['sum']:.6f}")
+
+    metric = f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds"
+    lines.append(f"# TYPE {metric} gauge")
+    lines.append(f'{metric}{{job="{job}"}} {time.time():.0f}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str | Path, job: str) -> None:
+    """Write a Prometheus textfile (for node_exporter's textfile collector).
+
+    The file is replaced atomically so the collector never reads a partial file.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(format_prometheus(job))
+    os.replace(tmp, path)
+
+
+def add_cli_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the ``--metrics-jsonl`` / ``--metrics-prom`` options to an entry point."""
+    parser.add_argument("--metrics-jsonl", type=Path, help="Append a JSON-lines summary of run metrics to this file.")
+    parser.add_argument("--metrics-prom", type=Path, help="Write run metrics to this Prometheus textfile.")
+
+
+def export_from_args(args: argparse.Namespace, job: str) -> None:
+    """Export the recorded metrics to whatever the CLI options asked for."""
+    if args.metrics_jsonl:
+        write_jsonl(args.metrics_jsonl, job)
+        print(f"📊 Metrics appended to {args.metrics_jsonl}")
+    if args.metrics_prom:
+        write_prometheus(args.metrics_prom, job)
+        print(f"📊 Metrics written to {args.metrics_prom}")
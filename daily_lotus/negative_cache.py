@@ -0,0 +1,100 @@
+"""Persistent cache of candidate compounds that yielded nothing postable.
+
+Most candidates fail: the details query returns no row (no English label, no reference,
+no matching kingdom, ...) or the message is too long even after shortening. Remembering
+those failures lets ``run_bot`` drop them from the pool before querying anything.
+
+Entries expire after a per-reason TTL, since Wikidata curation can fix a compound later.
+A compound is only cached as ``too_long`` when none of its occurrences fits, which is
+only known when the details query returned fewer rows than its limit.
+"""
+
+import argparse
+import json
+import os
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from typing import TypedDict, cast
+
+NEGATIVE_CACHE_FILE = "negative_cache.json"
+
+TTLS = {
+    "no_details": timedelta(days=30),
+    "too_long": timedelta(days=90),
+}
+DEFAULT_TTL = timedelta(days=30)
+
+
+class NegativeEntry(TypedDict):
+    reason: str
+    cached_at: str
+
+
+def load_negative_cache() -> dict[str, NegativeEntry]:
+    if not os.path.exists(NEGATIVE_CACHE_FILE):
+        return {}
+    with open(NEGATIVE_CACHE_FILE) as f:
+        return cast(dict[str, NegativeEntry], json.load(f))
+
+
+def save_negative_cache(cache: dict[str, NegativeEntry]) -> None:
+    tmp = f"{NEGATIVE_CACHE_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp, NEGATIVE_CACHE_FILE)
+
+
+def is_expired(entry: NegativeEntry, now: datetime | None = None) -> bool:
+    now = now or datetime.now(timezone.utc)
+    return now - datetime.fromisoformat(entry["cached_at"]) > TTLS.get(entry["reason"], DEFAULT_TTL)
+
+
+def record_failure(cache: dict[str, NegativeEntry], qid: str, reason: str) -> None:
+    cache[qid] = {"reason": reason, "cached_at": datetime.now(timezone.utc).isoformat()}
+
+
+def viable(qids: Iterable[str], cache: dict[str, NegativeEntry]) -> list[str]:
+    """Return the QIDs that have no unexpired negative entry."""
+    now = datetime.now(timezone.utc)
+    return [qid for qid in qids if qid not in cache or is_expired(cache[qid], now)]
+
+
+def expire(cache: dict[str, NegativeEntry]) -> int:
+    """Drop expired entries from ``cache`` in place and return how many were dropped."""
+    now = datetime.now(timezone.utc)
+    expired = [qid for qid, entry in cache.items() if is_expired(entry, now)]
+    for qid in expired:
+        del cache[qid]
+    return len(expired)
+
+
+def print_stats(cache: dict[str, NegativeEntry]) -> None:
+    now = datetime.now(timezone.utc)
+    reasons = Counter(entry["reason"] for entry in cache.values())
+    expired = Counter(entry["reason"] for entry in cache.values() if is_expired(entry, now))
+    print(f"🗃️ {len(cache)} cached compounds in {NEGATIVE_CACHE_FILE}")
+    for reason, n in reasons.most_common():
+        ttl = TTLS.get(reason, DEFAULT_TTL)
+        print(f"  {reason}: {n} ({expired[reason]} expired, TTL {ttl.days} days)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and maintain the negative candidate cache.")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--stats", action="store_true", help="Show entries per reason (the default).")
+    action.add_argument("--expire", action="store_true", help="Remove expired entries.")
+    action.add_argument("--clear", action="store_true", help="Remove all entries (or those of --reason).")
+    parser.add_argument("--reason", help="Only clear entries with this reason, e.g. too_long.")
+    args = parser.parse_args()
+
+    cache = load_negative_cache()
+    if args.expire:
+        print(f"🧹 Expired {expire(cache)} entries, {len(cache)} left.")
+        save_negative_cache(cache)
+    elif args.clear:
+        kept = {qid: entry for qid, entry in cache.items() if args.reason and entry["reason"] != args.reason}
+        print(f"🧹 Cleared {len(cache) - len(kept)} entries, {len(kept)} left.")
+        save_negative_cache(kept)
+    else:
+        print_stats(cache)
@@ -0,0 +1,169 @@
+"""Persistent queue of edit-notification replies.
+
+``check_edits`` queues replies instead of posting them one by one. The queue is written
+to disk before anything is sent, so replies survive a crash and are sent on the next
+run. Draining goes through the single pooled Mastodon client, which paces requests
+according to the server's ``X-RateLimit-*`` headers.
+
+The queue is only read and written under ``log.log_lock``, together with the extended log.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import TypedDict, cast
+
+from daily_lotus import metrics
+from daily_lotus.log import PostRecord, checkpoint_entry
+from daily_lotus.mastodon_client import post_to_mastodon
+
+QUEUE_FILE = "reply_queue.json"
+
+# Transient failures (5xx, network) are retried with exponential backoff before giving up for this run
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 2.0
+
+# Statuses after which a reply can never be sent, e.g. the toot it answers was deleted.
+# Anything else (401/403 from a revoked token, 429, ...) keeps the queue for a later run.
+PERMANENT_STATUSES = {404, 410, 422}
+
+
+class QueuedReply(TypedDict):
+    toot_id: str
+    message: str
+    compound_qid: str
+    taxon_qid: str
+    queued_at: str
+
+
+def load_queue() -> list[QueuedReply]:
+    if not os.path.exists(QUEUE_FILE):
+        return []
+    with open(QUEUE_FILE) as f:
+        return cast(list[QueuedReply], json.load(f))
+
+
+def save_queue(queue: list[QueuedReply]) -> None:
+    tmp = f"{QUEUE_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(queue, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, QUEUE_FILE)
+
+
+def enqueue_reply(entry: PostRecord, message: str) -> bool:
+    """Persist a reply to ``entry``'s toot.
+
+    Parameters
+    ----------
+    entry : PostRecord
+        Logged post to reply to.
+    message : str
+        Reply text.
+
+    Returns
+    -------
+    bool
+        ``False`` if the very same reply is already queued (e.g. left over from a crashed run).
+    """
+    toot_id = cast(str, entry["toot_id"])
+    queue = load_queue()
+    if any(r["toot_id"] == toot_id and r["message"] == message for r in queue):
+        return False
+    queue.append({
+        "toot_id": toot_id,
+        "message": message,
+        "compound_qid": entry["compound_qid"],
+        "taxon_qid": entry["taxon_qid"],
+        "queued_at": datetime.now(timezone.utc).isoformat(),
+    })
+    save_queue(queue)
+    metrics.incr("replies_queued")
+    return True
+
+
+def idempotency_key(reply: QueuedReply) -> str:
+    return hashlib.sha256(f"{reply['toot_id']}\n{reply['message']}".encode()).hexdigest()
+
+
+def is_permanent(error: Exception) -> bool:
+    # Mastodon.py errors carry (message, HTTP status, reason, error)
+    return len(error.args) > 1 and error.args[1] in PERMANENT_STATUSES
+
+
+def send_reply(reply: QueuedReply) -> None:
+    from mastodon import MastodonNetworkError, MastodonServerError
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            # The same key on every attempt: a retry after a read timeout cannot post twice
+            post_to_mastodon(reply["message"], in_reply_to_id=reply["toot_id"], idempotency_key=idempotency_key(reply))
+        except (MastodonServerError, MastodonNetworkError) as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            delay = BACKOFF_SECONDS * 2 ** (attempt - 1)
+            print(f"⏳ Mastodon error ({e}), retrying in {delay:.0f}s...")
+            metrics.incr("reply_retries")
+            time.sleep(delay)
+        else:
+            return
+
+
+def drain_queue(log: list[PostRecord], save_log: Callable[[list[PostRecord]], None]) -> int:
+    """Send queued replies in order, stamping ``last_reply_timestamp`` after each success.
+
+    The queue file is rewritten after every reply, so nothing is sent twice, and every stamped
+    entry is checkpointed right away; the whole log is saved once draining stops.
+
+    Parameters
+    ----------
+    log : list[PostRecord]
+        Extended log, whose ``last_reply_timestamp`` is updated for every sent reply.
+    save_log : Callable[[list[PostRecord]], None]
+        Persists ``log``.
+
+    Returns
+    -------
+    int
+        Number of replies sent. Replies that could not be sent stay queued for the next run.
+    """
+    queue = load_queue()
+    if not queue:
+        return 0
+    # Below the early return: a run with nothing queued never pays for importing Mastodon.py
+    from mastodon import MastodonAPIError, MastodonNetworkError, MastodonServerError
+
+    print(f"📬 Sending {len(queue)} queued repl{'y' if len(queue) == 1 else 'ies'}...")
+    entries_by_toot = {entry["toot_id"]: entry for entry in log if entry.get("toot_id")}
+    sent = 0
+    try:
+        while queue:
+            reply = queue[0]
+            try:
+                send_reply(reply)
+            except (MastodonServerError, MastodonNetworkError) as e:
+                print(f"⚠️ Mastodon is unavailable ({e}); {len(queue)} repl(ies) left queued for the next run.")
+                metrics.incr("replies_deferred", len(queue))
+                break
+            except MastodonAPIError as e:
+                if not is_permanent(e):
+                    print(f"⚠️ Mastodon refused the reply ({e}); {len(queue)} repl(ies) left queued for the next run.")
+                    metrics.incr("replies_deferred", len(queue))
+                    break
+                print(f"🗑️ Dropping reply to {reply['toot_id']}: {e}")
+                metrics.incr("replies_dropped")
+            else:
+                sent += 1
+                metrics.incr("replies_posted")
+                if entry := entries_by_toot.get(reply["toot_id"]):
+                    entry["last_reply_timestamp"] = datetime.now(tz=timezone.utc).isoformat()
+                    checkpoint_entry(entry)
+            queue.pop(0)
+            save_queue(queue)
+    finally:
+        if sent:
+            save_log(log)
+
+    return sent
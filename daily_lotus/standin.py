@@ -0,0 +1,352 @@
+"""Local stand-in for Wikidata, the depiction service and Mastodon.
+
+Serves recorded responses so the whole pipeline can be load- and soak-tested offline:
+
+- ``/sparql``: the SPARQL endpoint, answered from recorded results. ``ASK`` queries are
+  answered from a set of (compound, taxon) P703 pairs when one is given.
+- ``/w/api.php`` and ``/wiki/Special:EntityData/<qid>.json``: revisions and entity data.
+- ``/latest/depict/2D`` and ``/wiki/Special:FilePath/<name>``: molecule depiction and taxon images.
+- ``/api/v1/media``, ``/api/v2/media`` and ``/api/v1/statuses``: Mastodon uploads and posts.
+- ``/v2/stream/recentchange``: EventStreams, replaying a recorded JSON-lines file as server-sent events.
+
+Latency, error rate and 429 throttling can be injected to exercise retry and rate-limit
+handling. Point the bot at it with the environment variables printed on startup.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from pathlib import Path
+from typing import Any, cast
+
+# Recorded responses ship with the package, so the stand-in runs from any directory
+DEFAULT_FIXTURES = Path(__file__).parent / "fixtures"
+
+# Mastodon allows 300 requests per 5 minutes per account
+MASTODON_RATE_LIMIT = 300
+MASTODON_RATE_WINDOW = 300
+
+
+class StandInState:
+    """Fixtures, fault injection settings and everything posted so far."""
+
+    def __init__(
+        self,
+        fixtures: Path = DEFAULT_FIXTURES,
+        occurrences: set[tuple[str, str]] | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int | None = None,
+        recentchange: Path | None = None,
+    ) -> None:
+        self.fixtures = fixtures
+        self.recentchange = recentchange
+        self.occurrences = occurrences
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        # Fault injection must be reproducible from a seed, so this is not a security use
+        self.random = random.Random(seed)  # noqa: S311
+        self.lock = threading.Lock()
+        self.ids = count(1)
+        self.statuses: list[dict[str, Any]] = []
+        # Like Mastodon, a repeated Idempotency-Key returns the status already posted
+        self.idempotent: dict[str, dict[str, Any]] = {}
+        self.media: list[dict[str, Any]] = []
+        self.requests = 0
+        self.rate_window_start = time.time()
+        self.rate_used = 0
+
+    def fixture(self, name: str) -> dict[str, Any]:
+        return cast(dict[str, Any], json.loads((self.fixtures / name).read_text()))
+
+    def next_id(self) -> str:
+        with self.lock:
+            return str(110_000_000_000_000_000 + next(self.ids))
+
+    def roll(self) -> int | None:
+        """Decide whether to inject a fault; return the status code to fail with, if any."""
+        with self.lock:
+            self.requests += 1
+            draw = self.random.random()
+        if draw < self.throttle_rate:
+            return 429
+        if draw < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+    def delay(self) -> float:
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def mastodon_rate_headers(self) -> dict[str, str]:
+        with self.lock:
+            now = time.time()
+            if now - self.rate_window_start >= MASTODON_RATE_WINDOW:
+                self.rate_window_start, self.rate_used = now, 0
+            self.rate_used += 1
+            reset = self.rate_window_start + MASTODON_RATE_WINDOW
+            remaining = max(0, MASTODON_RATE_LIMIT - self.rate_used)
+        return {
+            "X-RateLimit-Limit": str(MASTODON_RATE_LIMIT),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(reset)),
+        }
+
+    def sparql(self, query: str, base_url: str) -> dict[str, Any]:
+        if query.lstrip().startswith("ASK"):
+            if self.occurrences is None:
+                return self.fixture("sparql_ask.json")
+            match = re.search(r"wd:(Q\d+)\s+wdt:P703\s+wd:(Q\d+)", query)
+            found = match is not None and (match.group(1), match.group(2)) in self.occurrences
+            return {"head": {}, "boolean": found}
+        if "SELECT DISTINCT ?compound" in query:
+            return self.fixture("sparql_candidates.json")
+        if "SELECT ?compoundLabel ?taxonLabel ?referenceLabel" in query:
+            return self.fixture("sparql_current_labels.json")
+        if match := re.search(r"VALUES \?compound \{wd:(Q\d+)\}", query):
+            body = self.fixture("sparql_molecule_details.json")
+            for row in body["results"]["bindings"]:
+                row["compound"]["value"] = f"http://www.wikidata.org/entity/{match.group(1)}"
+                # Serve taxon images from here rather than from Commons
+                name = row["taxon_image"]["value"].rsplit("/", 1)[-1]
+                row["taxon_image"]["value"] = f"{base_url}/wiki/Special:FilePath/{name}"
+            return body
+        return {"head": {"vars": []}, "results": {"bindings": []}}
+
+    def entity_data(self, qid: str, revid: str | None) -> dict[str, Any]:
+        revisions = self.fixture("entity_data.json")
+        entity = revisions.get(revid or "") or revisions[max(revisions)]
+        return {"entities": {qid: {**entity, "id": qid}}}
+
+    def revisions(self, qid: str) -> dict[str, Any]:
+        body = self.fixture("wikidata_revisions.json")
+        for page in body["query"]["pages"]:
+            page["title"] = qid
+        return body
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: "StandInServer"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def state(self) -> StandInState:
+        return self.server.state
+
+    def do_GET(self) -> None:
+        self.handle_request("GET")
+
+    def do_POST(self) -> None:
+        self.handle_request("POST")
+
+    def read_params(self, url: urllib.parse.SplitResult, body: bytes) -> dict[str, str]:
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            params.update({k: v[-1] for k, v in urllib.parse.parse_qs(body.decode()).items()})
+        elif content_type.startswith("application/json"):
+            params.update({k: v for k, v in json.loads(body or b"{}").items() if isinstance(v, str)})
+        return params
+
+    def handle_request(self, method: str) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        params = self.read_params(url, body)
+
+        time.sleep(self.state.delay())
+        is_mastodon = url.path.startswith("/api/")
+        extra_headers = self.state.mastodon_rate_headers() if is_mastodon else {}
+
+        fault = self.state.roll()
+        if fault == 429:
+            retry_at = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(time.time() + 1))
+            throttled = {**extra_headers, "Retry-After": "1", "X-RateLimit-Remaining": "0"}
+            if is_mastodon:
+                throttled["X-RateLimit-Reset"] = retry_at
+            self.send_json({"error": "Too many requests"}, 429, throttled)
+            return
+        if fault:
+            self.send_json({"error": "Injected failure"}, fault, extra_headers)
+            return
+
+        if is_mastodon:
+            # Mastodon.py asks for "/api/v1/instance/" when checking the server version
+            self.handle_mastodon(method, url.path.rstrip("/"), params, body, extra_headers)
+        else:
+            self.handle_wikidata(url.path, params)
+
+    def handle_wikidata(self, path: str, params: dict[str, str]) -> None:
+        if path == "/v2/stream/recentchange":
+            self.send_event_stream()
+        elif path == "/sparql":
+            accept = "application/sparql-results+json"
+            self.send_json(self.state.sparql(params.get("query", ""), self.base_url), 200, {}, accept)
+        elif path == "/w/api.php":
+            self.send_json(self.state.revisions(params.get("titles", "")))
+        elif match := re.fullmatch(r"/wiki/Special:EntityData/(Q\d+)\.json", path):
+            self.send_json(self.state.entity_data(match.group(1), params.get("revision")))
+        elif path == "/latest/depict/2D":
+            self.send_bytes((self.state.fixtures / "depict.svg").read_bytes(), "image/svg+xml")
+        elif path.startswith("/wiki/Special:FilePath/"):
+            self.send_bytes(b"\xff\xd8\xff\xe0" + bytes(2048), "image/jpeg")
+        else:
+            self.send_json({"error": "Not found"}, 404)
+
+    def handle_mastodon(
+        self, method: str, path: str, params: dict[str, str], body: bytes, extra_headers: dict[str, str]
+    ) -> None:
+        if path in ("/api/v1/media", "/api/v2/media") and method == "POST":
+            media = {"id": self.state.next_id(), "type": "image", "url": None, "description": None}
+            with self.state.lock:
+                self.state.media.append({**media, "size": len(body)})
+            self.send_json(media, 200, extra_headers)
+        elif path == "/api/v1/statuses" and method == "POST":
+            status = {
+                "id": self.state.next_id(),
+                "content": params.get("status", ""),
+                "in_reply_to_id": params.get("in_reply_to_id"),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+            }
+            key = self.headers.get("Idempotency-Key")
+            with self.state.lock:
+                if key and key in self.state.idempotent:
+                    status = self.state.idempotent[key]
+                else:
+                    self.state.statuses.append(status)
+                    if key:
+                        self.state.idempotent[key] = status
+            self.send_json(status, 200, extra_headers)
+        elif path in ("/api/v1/instance", "/api/v2/instance"):
+            instance = {"uri": "localhost", "title": "stand-in", "version": "4.3.0", "api_versions": {"mastodon": 2}}
+            self.send_json(instance, 200, extra_headers)
+        else:
+            self.send_json({"error": "Record not found"}, 404, extra_headers)
+
+    def send_event_stream(self) -> None:
+        """Replay recorded recentchange events, resuming after ``Last-Event-ID``, then close."""
+        path = self.state.recentchange or self.state.fixtures / "recentchange.jsonl"
+        events = [line for line in path.read_text().splitlines() if line.strip()]
+        start = int(self.headers.get("Last-Event-ID") or -1) + 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for offset, line in enumerate(events[start:], start):
+            self.wfile.write(f"event: message\nid: {offset}\ndata: {line}\n\n".encode())
+        self.close_connection = True
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.headers.get('Host', '127.0.0.1')}"
+
+    def send_json(
+        self,
+        payload: Any,
+        status: int = 200,
+        headers: dict[str, str] | None = None,
+        content_type: str = "application/json",
+    ) -> None:
+        self.send_bytes(json.dumps(payload).encode(), content_type, status, headers)
+
+    def send_bytes(
+        self, data: bytes, content_type: str, status: int = 200, headers: dict[str, str] | None = None
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], state: StandInState, verbose: bool = False) -> None:
+        super().__init__(address, StandInHandler)
+        self.state = state
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def environment(self) -> dict[str, str]:
+        """Environment variables that point the bot at this server."""
+        return {
+            "WD_SPARQL_ENDPOINT": f"{self.url}/sparql",
+            "WD_SCHOLARLY_SPARQL_ENDPOINT": f"{self.url}/sparql",
+            "WIKIDATA_BASE_URL": self.url,
+            "DEPICT_BASE_URL": f"{self.url}/latest",
+            "RECENTCHANGE_STREAM_URL": f"{self.url}/v2/stream/recentchange",
+            "MASTODON_API_BASE_URL": self.url,
+            "MASTODON_ACCESS_TOKEN": "stand-in",
+        }
+
+
+def load_occurrences(path: Path) -> set[tuple[str, str]]:
+    """Read P703 pairs, one ``<compound QID> <taxon QID>`` per line."""
+    pairs = set()
+    for line in path.read_text().splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and not line.startswith("#"):
+            pairs.add((fields[0], fields[1]))
+    return pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Wikidata, depiction and Mastodon APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES, help="Directory of recorded responses.")
+    parser.add_argument(
+        "--occurrences", type=Path, help="P703 pairs used to answer ASK queries (default: always true)."
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request, in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- variation of the latency, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests failing with 429.")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible fault injection.")
+    parser.add_argument("--recentchange", type=Path, help="JSON-lines events served on /v2/stream/recentchange.")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args()
+
+    state = StandInState(
+        fixtures=args.fixtures,
+        occurrences=load_occurrences(args.occurrences) if args.occurrences else None,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+        recentchange=args.recentchange,
+    )
+    server = StandInServer((args.host, args.port), state, verbose=args.verbose)
+    print(f"🧪 Stand-in listening on {server.url}. Point the bot at it with:")
+    for key, value in server.environment().items():
+        print(f"export {key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"🛑 Served {state.requests} requests, {len(state.statuses)} statuses posted.")
+
+
+if __name__ == "__main__":
+    main()
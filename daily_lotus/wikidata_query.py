@@ -1,14 +1,28 @@
 import secrets
 import urllib.parse
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from datetime import datetime
 from itertools import pairwise
 from typing import Any, cast
 
-import requests
-from SPARQLWrapper import JSON, SPARQLWrapper
+from daily_lotus import config, metrics
+from daily_lotus.http_session import get_session
 
-WD_ENDPOINT = "https://query.wikidata.org/sparql"
+
+def run_sparql(query: str, name: str) -> dict[str, Any]:
+    """Run ``query`` against the Wikidata query service, timed as ``sparql_query{query=name}``."""
+    # Imported here so entry points that never query (e.g. nothing to check) start faster
+    from SPARQLWrapper import JSON, SPARQLWrapper
+
+    sparql = SPARQLWrapper(config.WD_SPARQL_ENDPOINT)
+    sparql.addCustomHttpHeader(
+        "User-Agent",
+        "DailyLotusBot/0.1 (https://www.earthmetabolome.org/; contact@earthmetabolome.org)",
+    )
+    sparql.setQuery(query)
+    sparql.setReturnFormat(JSON)
+    with metrics.timed("sparql_query", query=name):
+        return cast(dict[str, Any], sparql.query().convert())
 
 
 def get_candidate_qids() -> list[str]:
@@ -20,21 +34,36 @@ def get_candidate_qids() -> list[str]:
     }
     LIMIT 500000
     """
-    sparql = SPARQLWrapper(WD_ENDPOINT)
-    sparql.addCustomHttpHeader(
-        "User-Agent",
-        "DailyLotusBot/0.1 (https://www.earthmetabolome.org/; contact@earthmetabolome.org)",
-    )
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    raw = cast(dict[str, Any], sparql.query().convert())
+    raw = run_sparql(query, "candidates")
     results = raw["results"]["bindings"]
     return [row["compound"]["value"].split("/")[-1] for row in results]
 
 
-def get_molecule_details(qid: str) -> dict[str, str] | None:
+# Rows fetched per compound: when that many come back, the compound may have more occurrences
+MAX_OCCURRENCES = 10
+
+
+def get_molecule_details(qid: str, languages: Iterable[str] = ()) -> dict[str, str] | None:
+    """Fetch one random postable occurrence of ``qid``, or ``None`` if there is none."""
+    occurrences = get_molecule_occurrences(qid, languages)
+    return occurrences[0] if occurrences else None
+
+
+def get_molecule_occurrences(qid: str, languages: Iterable[str] = ()) -> list[dict[str, str]]:
+    """Fetch up to ``MAX_OCCURRENCES`` postable occurrences of ``qid``, in random order.
+
+    Labels are English. For every other code in ``languages`` the same query also fetches
+    ``compound_<lang>``, ``taxon_<lang>`` and ``kingdom_label_<lang>``, falling back to English.
+    """
+    extra = sorted({lang for lang in languages if lang != "en"})
+    variables = " ".join(f"?{v}_{lang}" for lang in extra for v in ("compoundLabel", "taxonLabel", "kingdomLabel"))
+    optionals = "\n".join(
+        f"""      OPTIONAL {{ ?{item} rdfs:label ?{item}Label_{lang} . FILTER (lang(?{item}Label_{lang}) = "{lang}") }}"""
+        for lang in extra
+        for item in ("compound", "taxon", "kingdom")
+    )
     query = f"""
-    SELECT ?compoundLabel ?compound ?taxon ?taxonLabel ?reference ?referenceLabel ?smiles ?taxon_image ?kingdom ?kingdomLabel WHERE {{
+    SELECT ?compoundLabel ?compound ?taxon ?taxonLabel ?reference ?referenceLabel ?smiles ?taxon_image ?kingdom ?kingdomLabel {variables} WHERE {{
       VALUES ?compound {{wd:{qid}}}
       ?compound wdt:P233 ?smiles_c .
       OPTIONAL {{ ?compound wdt:P2017 ?smiles_i . }}
@@ -57,25 +86,21 @@ def get_molecule_details(qid: str) -> dict[str, str] | None:
       ?kingdom rdfs:label ?kingdomLabel . FILTER (lang(?kingdomLabel) = "en")
       ?compound rdfs:label ?compoundLabel . FILTER (lang(?compoundLabel) = "en")
       ?taxon rdfs:label ?taxonLabel . FILTER (lang(?taxonLabel) = "en")
-      SERVICE <https://query-scholarly.wikidata.org/sparql> {{
+{optionals}
+      SERVICE <{config.WD_SCHOLARLY_SPARQL_ENDPOINT}> {{
         ?reference rdfs:label ?referenceLabel . FILTER (lang(?referenceLabel) = "en")
       }}
     }}
-    LIMIT 10
+    LIMIT {MAX_OCCURRENCES}
     """
-    sparql = SPARQLWrapper(WD_ENDPOINT)
-    sparql.addCustomHttpHeader(
-        "User-Agent",
-        "DailyLotusBot/0.1 (https://www.earthmetabolome.org/; contact@earthmetabolome.org)",
-    )
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    raw = cast(dict[str, Any], sparql.query().convert())
-    results = raw["results"]["bindings"]
-    if not results:
-        return None
+    raw = run_sparql(query, "molecule_details")
+    results = list(raw["results"]["bindings"])
+    secrets.SystemRandom().shuffle(results)
+    return [parse_occurrence(row, extra) for row in results]
+
 
-    row = secrets.choice(results)
+def parse_occurrence(row: dict[str, Any], extra: list[str]) -> dict[str, str]:
+    """Turn a details query result row into the fields ``run_bot`` posts."""
 
     def extract_val(f: str) -> str:
         return str(row.get(f, {}).get("value", ""))
@@ -87,11 +112,17 @@ def get_molecule_details(qid: str) -> dict[str, str] | None:
 
     smiles = extract_val("smiles")
     image_url = (
-        f"https://dev.api.naturalproducts.net/latest/depict/2D?"
+        f"{config.DEPICT_BASE_URL}/depict/2D?"
         f"smiles={urllib.parse.quote(smiles)}&width=300&height=200"
         f"&toolkit=cdk&rotate=0&CIP=false&unicolor=false"
     )
 
+    localized = {
+        f"{key}_{lang}": extract_val(f"{var}_{lang}") or extract_val(var)
+        for lang in extra
+        for key, var in (("compound", "compoundLabel"), ("taxon", "taxonLabel"), ("kingdom_label", "kingdomLabel"))
+    }
+
     return {
         "compound": extract_val("compoundLabel"),
         "compound_qid": extract_qid("compound"),
@@ -103,12 +134,14 @@ def get_molecule_details(qid: str) -> dict[str, str] | None:
         "image_url": image_url,
         "taxon_image_url": extract_val("taxon_image"),
         "taxon_emoji": {"Q756": "🌿", "Q764": "🍄", "Q729": "🐛", "Q10876": "🦠"}.get(extract_qid("kingdom"), "🧬"),
+        "kingdom_qid": extract_qid("kingdom"),
         "kingdom_label": extract_val("kingdomLabel"),
+        **localized,
     }
 
 
 def get_revisions(qid: str, since: datetime) -> list[dict[str, Any]]:
-    url = "https://www.wikidata.org/w/api.php"
+    url = f"{config.WIKIDATA_BASE_URL}/w/api.php"
     params = {
         "action": "query",
         "prop": "revisions",
@@ -120,19 +153,21 @@ def get_revisions(qid: str, since: datetime) -> list[dict[str, Any]]:
         "format": "json",
     }
     headers = {"User-Agent": "DailyLotusBot/0.1 (https://www.earthmetabolome.org/; contact@earthmetabolome.org)"}
-    response = requests.get(url, params=params, headers=headers, timeout=10)
-    response.raise_for_status()
-    data = response.json()
+    with metrics.timed("wikidata_api", endpoint="revisions"):
+        response = get_session().get(url, params=params, headers=headers, timeout=10)
+        response.raise_for_status()
+        data = response.json()
     pages = data.get("query", {}).get("pages", [])
     return cast(list[dict[str, Any]], pages[0]["revisions"]) if pages and "revisions" in pages[0] else []
 
 
 def get_entity_data(qid: str, revid: int) -> dict[str, Any]:
-    url = f"https://www.wikidata.org/wiki/Special:EntityData/{qid}.json?revision={revid}"
+    url = f"{config.WIKIDATA_BASE_URL}/wiki/Special:EntityData/{qid}.json?revision={revid}"
     headers = {"User-Agent": "DailyLotusBot/0.1 (https://www.earthmetabolome.org/; contact@earthmetabolome.org)"}
-    r = requests.get(url, headers=headers, timeout=10)
-    r.raise_for_status()
-    return cast(dict[str, Any], r.json()["entities"][qid])
+    with metrics.timed("wikidata_api", endpoint="entity_data"):
+        r = get_session().get(url, headers=headers, timeout=10)
+        r.raise_for_status()
+        return cast(dict[str, Any], r.json()["entities"][qid])
 
 
 def get_label_from_revision(qid: str, revid: int) -> str | None:
@@ -216,34 +251,21 @@ def get_reference_label_change_editor(qid: str, old_label: str, since: datetime)
 
 
 def occurrence_still_exists(compound_qid: str, taxon_qid: str) -> bool:
-    sparql = SPARQLWrapper(WD_ENDPOINT)
-    sparql.addCustomHttpHeader(
-        "User-Agent",
-        "DailyLotusBot/0.1 (https://www.earthmetabolome.org/; contact@earthmetabolome.org)",
-    )
-    sparql.setQuery(f"ASK {{ wd:{compound_qid} wdt:P703 wd:{taxon_qid} . }}")
-    sparql.setReturnFormat(JSON)
-    result = cast(dict[str, Any], sparql.query().convert())
+    result = run_sparql(f"ASK {{ wd:{compound_qid} wdt:P703 wd:{taxon_qid} . }}", "occurrence_ask")
     return cast(bool, result.get("boolean", False))
 
 
 def fetch_current_labels(compound_qid: str, taxon_qid: str, reference_qid: str) -> dict[str, str]:
-    sparql = SPARQLWrapper(WD_ENDPOINT)
-    sparql.addCustomHttpHeader(
-        "User-Agent",
-        "DailyLotusBot/0.1 (https://www.earthmetabolome.org/; contact@earthmetabolome.org)",
-    )
-    sparql.setQuery(f"""
+    query = f"""
     SELECT ?compoundLabel ?taxonLabel ?referenceLabel WHERE {{
       OPTIONAL {{ wd:{compound_qid} rdfs:label ?compoundLabel . FILTER(LANG(?compoundLabel) = "en") }}
       OPTIONAL {{ wd:{taxon_qid} rdfs:label ?taxonLabel . FILTER(LANG(?taxonLabel) = "en") }}
-      SERVICE <https://query-scholarly.wikidata.org/sparql> {{
+      SERVICE <{config.WD_SCHOLARLY_SPARQL_ENDPOINT}> {{
         OPTIONAL {{ wd:{reference_qid} rdfs:label ?referenceLabel . FILTER(LANG(?referenceLabel) = "en") }}
       }}
     }}
-    """)
-    sparql.setReturnFormat(JSON)
-    raw = cast(dict[str, Any], sparql.query().convert())
+    """
+    raw = run_sparql(query, "current_labels")
     bindings = raw.get("results", {}).get("bindings", [])
     if not bindings:
         return {"compound_label": "", "taxon_label": "", "reference_label": ""}
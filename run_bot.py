@@ -1,91 +1,185 @@
 import argparse
 import json
 import secrets
+from typing import Any
 
-from daily_lotus.formatter import MessageTooLongError, compose_message
-from daily_lotus.log import record_post_extended, was_posted
-from daily_lotus.mastodon_client import post_to_mastodon
-from daily_lotus.wikidata_query import get_candidate_qids, get_molecule_details
+from daily_lotus import metrics
+from daily_lotus.accounts import Account, load_accounts
+from daily_lotus.formatter import MessageTooLongError, compose_alt_texts, compose_message
+from daily_lotus.log import load_log, record_post_extended
+from daily_lotus.mastodon_client import LocalizedPost, download_images, post_to_accounts
+from daily_lotus.negative_cache import NegativeEntry, load_negative_cache, record_failure, save_negative_cache, viable
+from daily_lotus.wikidata_query import MAX_OCCURRENCES, get_candidate_qids, get_molecule_occurrences
 
 
-def run(dry_run: bool = False, use_cache: bool = False):
+def load_candidates(use_cache: bool = False) -> list[str]:
     if use_cache:
         print("📦 Loading candidate compound QIDs from cache (candidates.json)...")
         with open("candidates.json") as f:
             qids = json.load(f)
+        metrics.incr("candidate_cache", result="hit")
     else:
         print("📡 Fetching candidate compound QIDs from Wikidata...")
         qids = get_candidate_qids()
+        metrics.incr("candidate_cache", result="miss")
+    return qids
 
-    secrets.SystemRandom().shuffle(qids)
 
-    for qid in qids:
-        print(f"🔍 Trying compound {qid}...")
-        details = get_molecule_details(qid)
+def compose_posts(details: dict[str, str], accounts: list[Account]) -> list[LocalizedPost]:
+    """Compose the message of every account that takes this occurrence, in its language.
 
-        if not details:
+    Raises ``MessageTooLongError`` if the primary (first) account's message does not fit;
+    other accounts whose message does not fit just skip this occurrence.
+    """
+    posts = []
+    for account in accounts:
+        if not account.accepts(details["kingdom_qid"]):
+            print(f"⏭️ {account.name} does not post {details['kingdom_label']}.")
             continue
 
-        compound_qid = details["compound_qid"]
-        taxon_qid = details["taxon_qid"]
-
-        if was_posted(compound_qid, taxon_qid):
-            print(f"⏩ Already posted {compound_qid} + {taxon_qid}, skipping.")
-            continue
+        def label(key: str, language: str = account.language) -> str:
+            return details.get(f"{key}_{language}", details[key])
 
         try:
             message = compose_message(
-                compound=details["compound"],
-                compound_qid=compound_qid,
-                taxon=details["taxon"],
-                taxon_qid=taxon_qid,
+                compound=label("compound"),
+                compound_qid=details["compound_qid"],
+                taxon=label("taxon"),
+                taxon_qid=details["taxon_qid"],
                 reference=details["reference"],
                 reference_qid=details["reference_qid"],
                 taxon_emoji=details["taxon_emoji"],
-                kingdom_label=details["kingdom_label"],
+                kingdom_label=label("kingdom_label"),
+                language=account.language,
             )
+        except MessageTooLongError:
+            if account is accounts[0]:
+                raise
+            print(f"⏭️ Message too long for {account.name}, not posting there.")
+            metrics.incr("posts_skipped", account=account.name, reason="too_long")
+            continue
+        posts.append(
+            LocalizedPost(account, message, *compose_alt_texts(label("compound"), label("taxon"), account.language))
+        )
+    return posts
+
+
+def first_fitting(
+    occurrences: list[dict[str, str]], accounts: list[Account]
+) -> tuple[dict[str, str], list[LocalizedPost]] | None:
+    """Return the first occurrence whose primary message fits, with its posts."""
+    for details in occurrences:
+        try:
+            return details, compose_posts(details, accounts)
         except MessageTooLongError as e:
             print(str(e))
-            print("⏭️ Skipping this compound-taxon pair due to length constraints.")
+    return None
+
+
+def report(posts: list[LocalizedPost], statuses: list[Any]) -> None:
+    for post, status in zip(posts, statuses, strict=True):
+        if isinstance(status, Exception):
+            print(f"⚠️ Posting to {post.account.name} failed: {status}")
+            metrics.incr("posts_failed", account=post.account.name)
+        else:
+            metrics.incr("posts", account=post.account.name)
+
+
+def publish(details: dict[str, str], posts: list[LocalizedPost]) -> None:
+    """Post to the primary account and log its toot, then fan out to the other accounts.
+
+    The other accounts only post once the occurrence is logged, so a failure of the
+    primary account never leaves unlogged posts behind.
+    """
+    print("🟢 Posting:")
+    print(posts[0].message)
+    images = download_images(details.get("image_url"), details.get("taxon_image_url"))
+
+    [primary] = post_to_accounts(posts[:1], images)
+    report(posts[:1], [primary])
+    if isinstance(primary, Exception):
+        raise primary
+    record_post_extended(
+        compound_qid=details["compound_qid"],
+        taxon_qid=details["taxon_qid"],
+        reference_qid=details["reference_qid"],
+        compound_label=details["compound"],
+        taxon_label=details["taxon"],
+        reference_label=details["reference"],
+        toot_id=str(primary["id"]) if primary else None,
+    )
+    print("✅ Posted and logged.")
+
+    if len(posts) > 1:
+        report(posts[1:], post_to_accounts(posts[1:], images))
+
+
+def run(
+    dry_run: bool = False, use_cache: bool = False, qids: list[str] | None = None, accounts: list[Account] | None = None
+):
+    accounts = accounts or load_accounts()
+    negative_cache = load_negative_cache()
+    try:
+        _run(dry_run, load_candidates(use_cache) if qids is None else qids, negative_cache, accounts)
+    finally:
+        # A dry run leaves no state behind
+        if not dry_run:
+            save_negative_cache(negative_cache)
+
+
+def _run(dry_run: bool, qids: list[str], negative_cache: dict[str, NegativeEntry], accounts: list[Account]) -> None:
+    languages = {account.language for account in accounts}
+    posted = set(load_log())
+
+    # Filtering also copies: callers such as the daemon keep the candidate list around between runs
+    pool = viable(qids, negative_cache)
+    print(f"🗃️ {len(pool)} of {len(qids)} candidates left after the negative cache.")
+    metrics.incr("candidates_skipped_cached", len(qids) - len(pool))
+    secrets.SystemRandom().shuffle(pool)
+
+    for qid in pool:
+        print(f"🔍 Trying compound {qid}...")
+        metrics.incr("candidates_probed")
+        occurrences = get_molecule_occurrences(qid, languages)
+
+        if not occurrences:
+            metrics.incr("candidates_rejected", reason="no_details")
+            record_failure(negative_cache, qid, "no_details")
             continue
 
-        # Set alt-text for both images
-        image_alt_text = f"Chemical structure of {details['compound']} displaying atoms and bonds."
-        taxon_image_alt_text = f"Image of {details['taxon']}, the taxon in which the compound is found."
+        # The query is capped: a full page may leave out occurrences that would fit
+        all_fetched = len(occurrences) < MAX_OCCURRENCES
+        occurrences = [d for d in occurrences if (d["compound_qid"], d["taxon_qid"]) not in posted]
+        if not occurrences:
+            print(f"⏩ Already posted every fetched occurrence of {qid}, skipping.")
+            metrics.incr("candidates_rejected", reason="already_posted")
+            continue
+
+        chosen = first_fitting(occurrences, accounts)
+        if chosen is None:
+            print("⏭️ Skipping this compound: no fetched occurrence fits the length constraints.")
+            metrics.incr("candidates_rejected", reason="too_long")
+            # Only cache the compound when every one of its occurrences was tried
+            if all_fetched:
+                record_failure(negative_cache, qid, "too_long")
+            continue
+        details, posts = chosen
 
         if dry_run:
             print("🧪 Dry run mode — not posting to Mastodon.")
-            print("------ Message ------")
-            print(message)
+            for post in posts:
+                print(f"------ Message ({post.account.name}, {post.account.language}) ------")
+                print(post.message)
+                print("🖼 Molecule Alt-Text:", post.image_alt_text)
+                print("🖼 Taxon Alt-Text:", post.taxon_image_alt_text)
             print("🖼 Molecule image URL:", details.get("image_url"))
             print("🖼 Taxon image URL:", details.get("taxon_image_url"))
-            print("🖼 Molecule Alt-Text:", image_alt_text)
-            print("🖼 Taxon Alt-Text:", taxon_image_alt_text)
         else:
-            print("🟢 Posting:")
-            print(message)
-            status = post_to_mastodon(
-                message,
-                image_url=details.get("image_url"),
-                taxon_image_url=details.get("taxon_image_url"),
-                image_alt_text=image_alt_text,  # Pass alt-text for the molecule image
-                taxon_image_alt_text=taxon_image_alt_text,  # Pass alt-text for the taxon image
-            )
-            toot_id = str(status["id"]) if status else None
-
-            record_post_extended(
-                compound_qid=compound_qid,
-                taxon_qid=taxon_qid,
-                reference_qid=details["reference_qid"],
-                compound_label=details["compound"],
-                taxon_label=details["taxon"],
-                reference_label=details["reference"],
-                toot_id=toot_id,
-            )
-            print("✅ Posted and logged.")
+            publish(details, posts)
         break
     else:
         print("❌ No new unique compound-taxon pair found.")
+        metrics.incr("runs_without_post")
 
 
 if __name__ == "__main__":
@@ -96,6 +190,11 @@ if __name__ == "__main__":
         action="store_true",
         help="Load candidate QIDs from candidates.json instead of querying Wikidata.",
     )
+    metrics.add_cli_arguments(parser)
     args = parser.parse_args()
 
-    run(dry_run=args.dry_run, use_cache=args.use_cache)
+    try:
+        with metrics.timed("run"):
+            run(dry_run=args.dry_run, use_cache=args.use_cache)
+    finally:
+        metrics.export_from_args(args, job="run_bot")
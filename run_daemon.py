@@ -0,0 +1,216 @@
+import argparse
+import json
+import signal
+import threading
+import time
+import traceback
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import run_bot
+from daily_lotus import metrics
+from daily_lotus.check_edits import check_edits
+from daily_lotus.log import LogVersion, PostRecord, load_extended_log, log_lock, log_version
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], None]
+    next_run: Callable[[datetime], datetime]
+    due: datetime = field(default_factory=datetime.now)
+    runs: int = 0
+    failures: int = 0
+    last_run: datetime | None = None
+    last_duration: float | None = None
+    last_error: str | None = None
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "due": self.due.isoformat(),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_duration_s": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+def daily_at(hour: int, minute: int) -> Callable[[datetime], datetime]:
+    def next_run(now: datetime) -> datetime:
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return candidate if candidate > now else candidate + timedelta(days=1)
+
+    return next_run
+
+
+def every(interval: timedelta) -> Callable[[datetime], datetime]:
+    return lambda now: now + interval
+
+
+class SharedState:
+    """What stays warm between runs: the candidate pool and the extended log."""
+
+    def __init__(self, use_cache: bool, candidates_ttl: timedelta) -> None:
+        self.use_cache = use_cache
+        self.candidates_ttl = candidates_ttl
+        self.candidates: list[str] | None = None
+        self.candidates_loaded_at = datetime.min
+        self.log: list[PostRecord] = []
+        self.log_version: LogVersion | None = None
+
+    def get_candidates(self) -> list[str]:
+        if self.candidates is None or datetime.now() - self.candidates_loaded_at > self.candidates_ttl:
+            self.candidates = run_bot.load_candidates(self.use_cache)
+            self.candidates_loaded_at = datetime.now()
+        else:
+            print(f"♻️ Reusing {len(self.candidates)} candidates loaded at {self.candidates_loaded_at:%H:%M}.")
+            metrics.incr("candidate_cache", result="hit")
+        return self.candidates
+
+    def get_log(self) -> list[PostRecord]:
+        """Return the extended log, re-reading it only if the file or its journal changed since it was loaded."""
+        version = log_version()
+        if version != self.log_version:
+            self.log = load_extended_log()
+            self.log_version = version
+        return self.log
+
+    def log_saved(self) -> None:
+        """The in-memory log was just written out: remember the file as up to date."""
+        self.log_version = log_version()
+
+
+class Daemon:
+    def __init__(self, jobs: list[Job], export: Callable[[], None]) -> None:
+        self.jobs = jobs
+        self.export = export
+        self.stop_event = threading.Event()
+        self.started_at = datetime.now()
+
+    def run_job(self, job: Job) -> None:
+        print(f"\n⏰ Running {job.name}...")
+        job.last_run = datetime.now()
+        start = time.perf_counter()
+        try:
+            with metrics.timed("job", task=job.name):
+                job.func()
+            job.last_error = None
+        except Exception as e:
+            # Keep the daemon alive: the failure is reported on /health and the job runs again when due
+            traceback.print_exc()
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+        finally:
+            job.runs += 1
+            job.last_duration = time.perf_counter() - start
+            job.due = job.next_run(datetime.now())
+            print(f"📅 Next {job.name} run at {job.due:%Y-%m-%d %H:%M}.")
+            self.export()
+
+    def serve(self) -> None:
+        for job in self.jobs:
+            print(f"📅 {job.name} scheduled for {job.due:%Y-%m-%d %H:%M}.")
+        while not self.stop_event.is_set():
+            job = min(self.jobs, key=lambda j: j.due)
+            wait = (job.due - datetime.now()).total_seconds()
+            # Wake up at least once a minute so clock jumps (suspend, DST) are noticed
+            if wait > 0:
+                self.stop_event.wait(min(wait, 60))
+                continue
+            self.run_job(job)
+        print("👋 Daemon stopped.")
+
+    def stop(self, *_: Any) -> None:
+        self.stop_event.set()
+
+    def health(self) -> tuple[int, dict[str, Any]]:
+        healthy = all(job.last_error is None for job in self.jobs)
+        return 200 if healthy else 503, {
+            "status": "ok" if healthy else "failing",
+            "started_at": self.started_at.isoformat(),
+            "jobs": {job.name: job.status() for job in self.jobs},
+        }
+
+
+def start_health_server(daemon: Daemon, host: str, port: int) -> ThreadingHTTPServer:
+    class HealthHandler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                status, payload = daemon.health()
+                body, content_type = json.dumps(payload).encode(), "application/json"
+            elif self.path == "/metrics":
+                status, body, content_type = 200, metrics.format_prometheus("daemon").encode(), "text/plain"
+            else:
+                status, body, content_type = 404, b"Not found\n", "text/plain"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), HealthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🩺 Health endpoint on http://{host}:{port}/health (metrics on /metrics)")
+    return server
+
+
+def parse_time(value: str) -> tuple[int, int]:
+    hour, minute = value.split(":")
+    return int(hour), int(minute)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the daily post and the edit checks from one long-lived process.")
+    parser.add_argument("--dry-run", action="store_true", help="Run the jobs without posting to Mastodon.")
+    parser.add_argument("--use-cache", action="store_true", help="Load candidate QIDs from candidates.json.")
+    parser.add_argument("--post-at", type=parse_time, default=(8, 0), help="Local time of the daily post (HH:MM).")
+    parser.add_argument("--check-every", type=float, default=60, help="Minutes between edit checks.")
+    parser.add_argument("--candidates-ttl", type=float, default=24, help="Hours before candidates are re-fetched.")
+    parser.add_argument("--health-host", default="127.0.0.1")
+    parser.add_argument("--health-port", type=int, default=8080, help="Port of the health endpoint (0 to disable).")
+    metrics.add_cli_arguments(parser)
+    args = parser.parse_args()
+
+    state = SharedState(use_cache=args.use_cache, candidates_ttl=timedelta(hours=args.candidates_ttl))
+
+    def post() -> None:
+        run_bot.run(dry_run=args.dry_run, qids=state.get_candidates())
+
+    def check() -> None:
+        if args.dry_run:
+            # A dry run updates labels in memory without saving them, so work on a fresh copy
+            check_edits(dry_run=True)
+            return
+        try:
+            # Lock before checking the file's version, so a concurrent writer's update is loaded
+            with log_lock():
+                check_edits(log=state.get_log())
+                state.log_saved()
+        except Exception:
+            # The in-memory log may be half-updated: reload it from disk next time
+            state.log_version = None
+            raise
+
+    post_at = daily_at(*args.post_at)
+    check_every = every(timedelta(minutes=args.check_every))
+    jobs = [
+        Job("daily_post", post, post_at, due=post_at(datetime.now())),
+        Job("check_edits", check, check_every),
+    ]
+    daemon = Daemon(jobs, export=lambda: metrics.export_from_args(args, job="daemon"))
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+
+    health_server = start_health_server(daemon, args.health_host, args.health_port) if args.health_port else None
+    try:
+        daemon.serve()
+    finally:
+        if health_server:
+            health_server.shutdown()
@@ -0,0 +1,27 @@
+import threading
+
+import pytest
+
+from daily_lotus import config
+from daily_lotus.standin import DEFAULT_FIXTURES, StandInServer, StandInState
+
+
+@pytest.fixture
+def in_tmp_path(tmp_path, monkeypatch):
+    """Run in an empty directory: the bot keeps its state files in the working directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    server = StandInServer(
+        ("127.0.0.1", 0), StandInState(DEFAULT_FIXTURES, occurrences={("Q104986113", "Q6985860")}, seed=0)
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    for key, value in server.environment().items():
+        monkeypatch.setattr(config, key, value)
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import run_bot
+from daily_lotus import accounts, mastodon_client
+from daily_lotus.log import load_extended_log
+
+pytestmark = pytest.mark.usefixtures("in_tmp_path")
+
+
+def write_accounts(entries):
+    with open(accounts.ACCOUNTS_FILE, "w") as f:
+        json.dump(entries, f)
+
+
+def test_without_accounts_file_the_configured_account_is_used(monkeypatch):
+    monkeypatch.setattr(accounts.config, "MASTODON_API_BASE_URL", "https://example.social")
+
+    [account] = accounts.load_accounts()
+
+    assert account.api_base_url == "https://example.social"
+    assert account.language == "en"
+
+
+def test_invalid_accounts_are_rejected():
+    write_accounts([{"name": "plants", "kingdoms": ["Q756"]}])
+    with pytest.raises(accounts.AccountConfigError, match="primary"):
+        accounts.load_accounts()
+
+    write_accounts([{"name": "main"}, {"name": "de", "language": "de"}])
+    with pytest.raises(accounts.AccountConfigError, match="'de'"):
+        accounts.load_accounts()
+
+
+def test_a_missing_token_variable_is_reported_at_load_time(monkeypatch):
+    monkeypatch.delenv("MASTODON_FR_ACCESS_TOKEN", raising=False)
+    write_accounts([{"name": "main"}, {"name": "fr", "access_token_env": "MASTODON_FR_ACCESS_TOKEN"}])
+
+    with pytest.raises(accounts.AccountConfigError, match="MASTODON_FR_ACCESS_TOKEN is not set"):
+        accounts.load_accounts()
+
+
+def test_one_selection_fans_out_to_every_matching_account(standin, monkeypatch):
+    monkeypatch.setenv("MASTODON_FR_ACCESS_TOKEN", "fr")
+    write_accounts([
+        {"name": "main"},
+        {"name": "fr", "language": "fr", "access_token_env": "MASTODON_FR_ACCESS_TOKEN"},
+        {"name": "plants", "kingdoms": ["Q756"]},
+    ])
+    downloads = []
+    # The depiction is an SVG: skip the cairo conversion, but count the downloads
+    monkeypatch.setattr(mastodon_client, "download_media", lambda url: downloads.append(url) or (b"", "image/png"))
+
+    run_bot.run(qids=["Q104986113"])
+
+    assert len(downloads) == 2
+    # Media belong to the uploading account: both images are uploaded by main and fr
+    assert len(standin.state.media) == 4
+    messages = sorted(status["content"] for status in standin.state.statuses)
+    assert [m.splitlines()[0] for m in messages] == [
+        "📣 Natural Product Occurrence of the Day",
+        "📣 Occurrence de produit naturel du jour",
+    ]
+    [entry] = load_extended_log()
+    primary = next(s for s in standin.state.statuses if s["content"].startswith("📣 Natural"))
+    assert entry["toot_id"] == primary["id"]
+
+
+def test_other_accounts_only_post_once_the_primary_toot_is_logged(monkeypatch):
+    main, fr = accounts.Account("main", None, None), accounts.Account("fr", None, None, language="fr")
+    posts = [mastodon_client.LocalizedPost(main, "en"), mastodon_client.LocalizedPost(fr, "fr")]
+    outage = ConnectionError()
+    posted = []
+
+    def post_to_accounts(posts, images):
+        posted.extend(post.account.name for post in posts)
+        return [outage for _ in posts]
+
+    monkeypatch.setattr(run_bot, "download_images", lambda image_url, taxon_image_url: [None, None])
+    monkeypatch.setattr(run_bot, "post_to_accounts", post_to_accounts)
+
+    with pytest.raises(ConnectionError):
+        run_bot.publish({}, posts)
+
+    assert posted == ["main"]
+    assert load_extended_log() == []
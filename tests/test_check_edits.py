@@ -0,0 +1,96 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from daily_lotus import check_edits, metrics
+from daily_lotus.log import (
+    checkpoint_entry,
+    journal_path,
+    load_extended_log,
+    log_lock,
+    record_post_extended,
+    save_extended_log,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics(in_tmp_path):
+    metrics.reset()
+
+
+def make_log(n):
+    return [
+        {"compound_qid": f"Q{i}", "taxon_qid": "Q6985860", "reference_qid": "Q52604398", "toot_id": str(i)}
+        for i in range(n)
+    ]
+
+
+def test_checkpointed_entries_survive_until_the_next_save():
+    log = make_log(3)
+    save_extended_log(log)
+
+    checkpoint_entry({**log[1], "compound_label_last_checked": "edited"})
+    with open(journal_path(), "a") as f:
+        f.write('{"compound_qid": "Q2", "taxon')  # Torn write from a crash
+
+    log = load_extended_log()
+    assert log[1]["compound_label_last_checked"] == "edited"
+    save_extended_log(log)
+    assert not Path(journal_path()).exists()
+    assert load_extended_log() == log
+
+
+def test_writers_wait_for_the_lock_holder():
+    save_extended_log(make_log(1))
+    daily_post = threading.Thread(target=record_post_extended, args=("Q9", "Q6985860", "Q52604398", "", "", "", "9"))
+
+    with log_lock():
+        log = load_extended_log()
+        daily_post.start()
+        daily_post.join(timeout=0.2)
+        assert daily_post.is_alive()
+        log[0]["compound_label_last_checked"] = "edited"
+        save_extended_log(log)
+    daily_post.join()
+
+    log = load_extended_log()
+    assert [entry["compound_qid"] for entry in log] == ["Q0", "Q9"]
+    assert log[0]["compound_label_last_checked"] == "edited"
+
+
+def test_runs_take_turns_within_their_request_budget(monkeypatch):
+    save_extended_log(make_log(3))
+    checked = []
+
+    def process_entry(entry, dry_run):
+        checked.append(entry["compound_qid"])
+        metrics.observe("sparql_query", 0.0)
+        return False
+
+    monkeypatch.setattr(check_edits, "process_entry", process_entry)
+
+    check_edits.check_edits(max_requests=2)
+    check_edits.check_edits(max_requests=2)
+
+    assert checked == ["Q0", "Q1", "Q2", "Q0"]
+    assert check_edits.load_cursor() == 1
+
+
+def test_a_crash_keeps_the_entries_already_checked(monkeypatch):
+    save_extended_log(make_log(3))
+
+    def process_entry(entry, dry_run):
+        if entry["compound_qid"] == "Q1":
+            raise TimeoutError
+        entry["compound_label_last_checked"] = "edited"
+        return True
+
+    monkeypatch.setattr(check_edits, "process_entry", process_entry)
+
+    with pytest.raises(TimeoutError):
+        check_edits.check_edits()
+
+    assert load_extended_log()[0]["compound_label_last_checked"] == "edited"
+    # The next run starts after the entry that failed
+    assert check_edits.load_cursor() == 2
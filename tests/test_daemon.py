@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from run_daemon import Daemon, Job, daily_at, every
+
+
+def test_daily_at_rolls_over_to_tomorrow():
+    next_run = daily_at(8, 0)
+
+    assert next_run(datetime(2025, 5, 1, 7, 59)) == datetime(2025, 5, 1, 8, 0)
+    assert next_run(datetime(2025, 5, 1, 8, 0)) == datetime(2025, 5, 2, 8, 0)
+
+
+def test_failing_job_is_rescheduled_and_reported():
+    def fail():
+        raise TimeoutError
+
+    job = Job("check_edits", fail, every(timedelta(minutes=30)))
+    daemon = Daemon([job], export=lambda: None)
+
+    daemon.run_job(job)
+
+    status, health = daemon.health()
+    assert status == 503
+    assert health["jobs"]["check_edits"]["last_error"] == "TimeoutError: "
+    assert job.failures == 1
+    assert job.due > datetime.now() + timedelta(minutes=29)
+
+    job.func = lambda: None
+    daemon.run_job(job)
+    assert daemon.health()[0] == 200
@@ -0,0 +1,108 @@
+import json
+from itertools import islice
+
+import pytest
+
+from daily_lotus import config, event_stream, metrics, reply_queue
+from daily_lotus.log import EXTENDED_LOG_FILE, checkpoint_entry, load_extended_log
+from daily_lotus.standin import DEFAULT_FIXTURES
+
+ENTRY = {
+    "compound_qid": "Q104986113",
+    "taxon_qid": "Q6985860",
+    "reference_qid": "Q52604398",
+    "compound_label": "Zythiostromic acid C",
+    "compound_label_last_checked": "Zythiostromic acid",
+    "taxon_label": "Nectria pseudotrichia",
+    "taxon_label_last_checked": "Nectria pseudotrichia",
+    "reference_label": "New isocoumarins, naphthoquinones, and a cleistanthane-type diterpene from Nectria pseudotrichia 120-1NP.",
+    "reference_label_last_checked": "New isocoumarins, naphthoquinones, and a cleistanthane-type diterpene from Nectria pseudotrichia 120-1NP.",
+    "toot_id": "114358250353918052",
+    "timestamp": "2025-04-18T09:26:59.761392",
+    "last_reply_timestamp": "2025-04-18T09:26:59.761392+00:00",
+    "p703_exists_last_checked": True,
+}
+
+
+@pytest.fixture(autouse=True)
+def extended_log(in_tmp_path):
+    with open(EXTENDED_LOG_FILE, "w") as f:
+        json.dump([ENTRY], f)
+
+
+def test_parse_sse():
+    lines = ["event: message", "id: 7", 'data: {"title": "Q1"}', "", ":keepalive", "", 'data: {"title": "Q2"}', ""]
+
+    assert list(event_stream.parse_sse(lines)) == [("7", {"title": "Q1"}), (None, {"title": "Q2"})]
+
+
+def test_parse_sse_skips_a_truncated_last_event():
+    metrics.reset()
+    lines = ['data: {"title": "Q1"}', "", 'data: {"title": "Q']
+
+    assert list(event_stream.parse_sse(lines)) == [(None, {"title": "Q1"})]
+    assert metrics.counter_total("stream_events_malformed") == 1
+
+
+def test_only_tracked_wikidata_items_are_queued():
+    consumer = event_stream.EditConsumer(dry_run=True, settle=60)
+
+    for event in event_stream.read_replay(DEFAULT_FIXTURES / "recentchange.jsonl"):
+        consumer.handle(*event)
+
+    assert list(consumer.pending) == [("Q104986113", "Q6985860", "Q52604398")]
+    # Not settled yet
+    assert consumer.flush() == 0
+
+
+def test_every_matching_edit_restarts_the_settle_timer():
+    consumer = event_stream.EditConsumer(dry_run=True, settle=60)
+    edit = {"wiki": "wikidatawiki", "title": ENTRY["compound_qid"]}
+
+    consumer.handle(None, edit)
+    for key in consumer.pending:
+        consumer.pending[key] -= 60  # The first edit has settled...
+    consumer.handle(None, edit)
+
+    # ...but the second one has not
+    assert consumer.flush() == 0
+
+
+def test_the_last_event_id_is_saved_without_matching_edits(monkeypatch):
+    monkeypatch.setattr(event_stream, "STATE_SAVE_INTERVAL", 0)
+    consumer = event_stream.EditConsumer()
+
+    event_stream.consume([("42", {"wiki": "wikidatawiki", "title": "Q1"})], consumer)
+
+    assert event_stream.load_last_event_id() == "42"
+
+
+def test_checkpoints_of_an_interrupted_check_edits_run_are_kept(monkeypatch):
+    consumer = event_stream.EditConsumer(settle=0)
+    # A killed check_edits run leaves its checkpoints in the journal, the log file is untouched
+    checkpoint_entry({**ENTRY, "taxon_label_last_checked": "checkpointed"})
+
+    def process_entry(entry, dry_run):
+        entry["compound_label_last_checked"] = ENTRY["compound_label"]
+        return True
+
+    monkeypatch.setattr(event_stream, "process_entry", process_entry)
+    consumer.handle(None, {"wiki": "wikidatawiki", "title": ENTRY["compound_qid"]})
+    consumer.flush(force=True)
+
+    [entry] = load_extended_log()
+    assert entry["taxon_label_last_checked"] == "checkpointed"
+    assert entry["compound_label_last_checked"] == ENTRY["compound_label"]
+
+
+def test_replayed_stream_triggers_a_reply(standin):
+    consumer = event_stream.EditConsumer(settle=0)
+
+    # The stand-in serves the four recorded events; the live stream would go on forever
+    events = islice(event_stream.stream_recentchanges(config.RECENTCHANGE_STREAM_URL), 4)
+    event_stream.consume(events, consumer)
+
+    assert standin.state.statuses[0]["in_reply_to_id"] == ENTRY["toot_id"]
+    assert reply_queue.load_queue() == []
+    with open(EXTENDED_LOG_FILE) as f:
+        assert json.load(f)[0]["compound_label_last_checked"] == "Zythiostromic acid C"
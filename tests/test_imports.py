@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+HEAVY = ["mastodon", "SPARQLWrapper", "cairosvg", "requests"]
+
+
+def heavy_modules_after(code, cwd=ROOT):
+    code = f"import sys\n{code}\nprint('heavy:', *(m for m in {HEAVY!r} if m in sys.modules))"
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    # The last line lists the heavy modules, after whatever the code printed
+    return result.stdout.splitlines()[-1].removeprefix("heavy:").strip()
+
+
+@pytest.mark.parametrize("module", ["run_bot", "run_daemon", "daily_lotus.check_edits", "daily_lotus.event_stream"])
+def test_entry_points_import_no_heavy_dependencies(module):
+    assert heavy_modules_after(f"import {module}") == ""
+
+
+def test_a_check_edits_run_with_nothing_to_do_imports_no_heavy_dependencies(tmp_path):
+    # No logged posts and no queued replies: nothing to query, nothing to send
+    assert heavy_modules_after("from daily_lotus.check_edits import check_edits\ncheck_edits()", cwd=tmp_path) == ""
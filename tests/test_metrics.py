@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from daily_lotus import metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_counters_are_split_by_labels():
+    metrics.incr("candidates_rejected", reason="too_long")
+    metrics.incr("candidates_rejected", reason="too_long")
+    metrics.incr("candidates_rejected", reason="no_details")
+
+    assert metrics.counter_total("candidates_rejected") == 3
+    counters = {c["labels"]["reason"]: c["value"] for c in metrics.snapshot()["counters"]}
+    assert counters == {"too_long": 2, "no_details": 1}
+
+
+def test_timed_records_spans_and_errors():
+    with metrics.timed("sparql_query", query="candidates"):
+        pass
+    with pytest.raises(RuntimeError), metrics.timed("sparql_query", query="candidates"):
+        raise RuntimeError
+
+    assert metrics.span_count("sparql_query") == 2
+    assert metrics.counter_total("sparql_query_errors") == 1
+
+
+def test_exports(tmp_path):
+    metrics.incr("posts")
+    metrics.observe("status_post", 0.5)
+
+    jsonl = tmp_path / "metrics.jsonl"
+    metrics.write_jsonl(jsonl, job="run_bot")
+    metrics.write_jsonl(jsonl, job="run_bot")
+    lines = jsonl.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["job"] == "run_bot"
+
+    prom = tmp_path / "daily_lotus.prom"
+    metrics.write_prometheus(prom, job="run_bot")
+    text = prom.read_text()
+    assert 'daily_lotus_posts_total{job="run_bot"} 1' in text
+    assert 'daily_lotus_status_post_seconds_sum{job="run_bot"} 0.500000' in text
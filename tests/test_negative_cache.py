@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import run_bot
+from daily_lotus import negative_cache
+
+pytestmark = pytest.mark.usefixtures("in_tmp_path")
+
+
+def cached(reason, days_ago):
+    return {"reason": reason, "cached_at": (datetime.now(timezone.utc) - timedelta(days=days_ago)).isoformat()}
+
+
+def test_entries_expire_per_reason():
+    cache = {
+        "Q1": cached("no_details", 10),
+        "Q2": cached("no_details", 40),
+        "Q3": cached("too_long", 40),
+        "Q4": cached("too_long", 100),
+    }
+
+    assert negative_cache.viable(["Q1", "Q2", "Q3", "Q4", "Q5"], cache) == ["Q2", "Q4", "Q5"]
+    assert negative_cache.expire(cache) == 2
+    assert sorted(cache) == ["Q1", "Q3"]
+
+
+def no_occurrences(queried):
+    def get_molecule_occurrences(qid, languages=()):
+        queried.append(qid)
+        return []
+
+    return get_molecule_occurrences
+
+
+def test_failed_candidates_are_not_queried_again(monkeypatch):
+    queried = []
+    monkeypatch.setattr(run_bot, "get_molecule_occurrences", no_occurrences(queried))
+
+    run_bot.run(qids=["Q1", "Q2"])
+    run_bot.run(qids=["Q1", "Q2", "Q3"])
+
+    assert sorted(queried) == ["Q1", "Q2", "Q3"]
+    assert negative_cache.load_negative_cache()["Q3"]["reason"] == "no_details"
+
+
+def test_dry_runs_leave_the_cache_alone(monkeypatch):
+    monkeypatch.setattr(run_bot, "get_molecule_occurrences", no_occurrences([]))
+
+    run_bot.run(dry_run=True, qids=["Q1"])
+
+    assert negative_cache.load_negative_cache() == {}
+
+
+def test_compounds_are_cached_as_too_long_only_when_no_occurrence_fits(monkeypatch):
+    def occurrence(taxon_qid, fits):
+        return {"compound_qid": "Q1", "taxon_qid": taxon_qid, "fits": fits, "kingdom_qid": "Q756"}
+
+    def compose_posts(details, accounts):
+        if not details["fits"]:
+            raise run_bot.MessageTooLongError
+        return [details["taxon_qid"]]
+
+    occurrences = {
+        "Q1": [occurrence("Q10", False), occurrence("Q11", True)],
+        "Q2": [occurrence("Q20", False)],
+        # A full page of rows: the compound may have occurrences the query left out
+        "Q3": [occurrence(f"Q3{i}", False) for i in range(run_bot.MAX_OCCURRENCES)],
+    }
+    monkeypatch.setattr(run_bot, "get_molecule_occurrences", lambda qid, languages=(): occurrences[qid])
+    monkeypatch.setattr(run_bot, "compose_posts", compose_posts)
+
+    assert run_bot.first_fitting(occurrences["Q1"], []) == (occurrences["Q1"][1], ["Q11"])
+    run_bot.run(qids=["Q2", "Q3"])
+
+    cache = negative_cache.load_negative_cache()
+    assert list(cache) == ["Q2"]
+    assert cache["Q2"]["reason"] == "too_long"
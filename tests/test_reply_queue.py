@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from daily_lotus import reply_queue
+from daily_lotus.log import journal_path
+
+
+@pytest.fixture
+def entry():
+    return {
+        "compound_qid": "Q104986113",
+        "taxon_qid": "Q6985860",
+        "toot_id": "114358250353918052",
+        "last_reply_timestamp": "2025-05-08T20:30:13.145635+00:00",
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(in_tmp_path, monkeypatch):
+    monkeypatch.setattr(reply_queue, "BACKOFF_SECONDS", 0)
+
+
+def test_enqueue_is_persistent_and_deduplicated(entry):
+    assert reply_queue.enqueue_reply(entry, "🛠️ edited")
+    assert not reply_queue.enqueue_reply(entry, "🛠️ edited")
+    assert reply_queue.enqueue_reply(entry, "💀 deleted")
+
+    with open(reply_queue.QUEUE_FILE) as f:
+        assert [r["message"] for r in json.load(f)] == ["🛠️ edited", "💀 deleted"]
+
+
+def test_drain_sends_and_stamps_replies(standin, entry):
+    reply_queue.enqueue_reply(entry, "🛠️ edited")
+    saved = []
+
+    assert reply_queue.drain_queue([entry], saved.append) == 1
+
+    assert standin.state.statuses[0]["in_reply_to_id"] == entry["toot_id"]
+    assert entry["last_reply_timestamp"] > "2025-05-08"
+    assert saved == [[entry]]
+    assert reply_queue.load_queue() == []
+    # Journaled right after the reply went out, in case the process dies before the log is saved
+    with open(journal_path()) as f:
+        assert json.loads(f.readline())["last_reply_timestamp"] == entry["last_reply_timestamp"]
+
+
+def test_unsent_replies_stay_queued(standin, entry):
+    reply_queue.enqueue_reply(entry, "🛠️ edited")
+    standin.state.error_rate = 1.0
+
+    assert reply_queue.drain_queue([entry], lambda log: None) == 0
+    assert len(reply_queue.load_queue()) == 1
+
+    standin.state.error_rate = 0.0
+    assert reply_queue.drain_queue([entry], lambda log: None) == 1
+    assert len(standin.state.statuses) == 1
+
+
+def failing_with(error):
+    def send_reply(reply):
+        raise error
+
+    return send_reply
+
+
+def test_replies_are_kept_when_the_token_is_rejected(monkeypatch, entry):
+    from mastodon import MastodonNotFoundError, MastodonUnauthorizedError
+
+    reply_queue.enqueue_reply(entry, "🛠️ edited")
+    reply_queue.enqueue_reply(entry, "💀 deleted")
+
+    unauthorized = MastodonUnauthorizedError("Mastodon API returned error", 401, "Unauthorized", "revoked")
+    monkeypatch.setattr(reply_queue, "send_reply", failing_with(unauthorized))
+    assert reply_queue.drain_queue([entry], lambda log: None) == 0
+    assert len(reply_queue.load_queue()) == 2
+
+    # The toot was deleted: nothing can ever be sent, so the replies are dropped
+    not_found = MastodonNotFoundError("Mastodon API returned error", 404, "Not Found", "Record not found")
+    monkeypatch.setattr(reply_queue, "send_reply", failing_with(not_found))
+    assert reply_queue.drain_queue([entry], lambda log: None) == 0
+    assert reply_queue.load_queue() == []
+
+
+def test_resending_a_reply_does_not_post_it_twice(standin, entry):
+    reply_queue.enqueue_reply(entry, "🛠️ edited")
+    [reply] = reply_queue.load_queue()
+
+    reply_queue.send_reply(reply)
+    reply_queue.send_reply(reply)
+
+    assert len(standin.state.statuses) == 1
@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+
+import requests
+
+from daily_lotus import mastodon_client, wikidata_query
+
+
+def test_wikidata_queries_hit_the_standin(standin):
+    assert wikidata_query.get_candidate_qids() == ["Q104986113", "Q105210352", "Q27290462"]
+    assert wikidata_query.occurrence_still_exists("Q104986113", "Q6985860")
+    assert not wikidata_query.occurrence_still_exists("Q104986113", "Q1")
+
+    details = wikidata_query.get_molecule_details("Q27290462")
+    assert details is not None
+    assert details["compound_qid"] == "Q27290462"
+    assert details["image_url"].startswith(standin.url)
+    assert details["taxon_image_url"].startswith(standin.url)
+
+    since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert wikidata_query.get_label_change_editor("Q104986113", "Zythiostromic acid", since) == "Curator"
+
+
+def test_reply_is_posted_to_the_standin(standin):
+    status = mastodon_client.post_to_mastodon("🛠️ edited", in_reply_to_id="42")
+
+    assert standin.state.statuses[0]["id"] == str(status["id"])
+    assert standin.state.statuses[0]["in_reply_to_id"] == "42"
+
+
+def test_fault_injection(standin):
+    standin.state.throttle_rate = 1.0
+    response = requests.get(f"{standin.url}/api/v1/instance", timeout=5)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert "X-RateLimit-Remaining" in response.headers